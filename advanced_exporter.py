@@ -6,56 +6,119 @@ v2.1.3 更新：提升座標精確度至12位小數點
 
 import os
 import json
+import functools
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from xml.dom import minidom
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+
+
+# YOLO 標籤行的格式模板；bytes 的 % 格式化是 CPython 最快的數值格式化路徑
+_YOLO_LINE_FMT = b'%d %.12f %.12f %.12f %.12f\n'
+
+
+@functools.lru_cache(maxsize=4096)
+def _probe_image_size(image_path: str, mtime_ns: int, size: int) -> Tuple[int, int]:
+    """解析圖片檔頭取得尺寸（不解碼像素），以 (路徑, mtime, 大小) 記憶化"""
+    try:
+        from PIL import Image
+    except ImportError:
+        # 沒有 PIL 時退回 QImageReader，同樣只讀檔頭不配置像素記憶體
+        from PyQt5.QtGui import QImageReader
+        qsize = QImageReader(image_path).size()
+        return qsize.width(), qsize.height()
+
+    with Image.open(image_path) as img:
+        return img.size
+
+
+def get_image_size(image_path: str) -> Tuple[int, int]:
+    """取得圖片寬高，檔案未變更時直接重用快取結果"""
+    st = os.stat(image_path)
+    return _probe_image_size(image_path, st.st_mtime_ns, st.st_size)
+
+
+# 車種類別對照表（模組層級建立一次，所有匯出器實例共用）
+_VEHICLE_CLASSES = {
+    0: {'zh': '汽車', 'en': 'car'},
+    1: {'zh': '卡車', 'en': 'truck'},
+    2: {'zh': '巴士', 'en': 'bus'},
+    3: {'zh': '機車', 'en': 'motorcycle'},
+    4: {'zh': '腳踏車', 'en': 'bicycle'},
+    5: {'zh': '貨車', 'en': 'van'},
+    6: {'zh': '休旅車', 'en': 'suv'},
+    7: {'zh': '跑車', 'en': 'sports_car'}
+}
 
 
 class AdvancedExporter:
     """進階匯出器，支援多種標註格式"""
-    
+
     def __init__(self):
-        self.vehicle_classes = {
-            0: {'zh': '汽車', 'en': 'car'},
-            1: {'zh': '卡車', 'en': 'truck'},
-            2: {'zh': '巴士', 'en': 'bus'},
-            3: {'zh': '機車', 'en': 'motorcycle'},
-            4: {'zh': '腳踏車', 'en': 'bicycle'},
-            5: {'zh': '貨車', 'en': 'van'},
-            6: {'zh': '休旅車', 'en': 'suv'},
-            7: {'zh': '跑車', 'en': 'sports_car'}
-        }
-        
+        self.vehicle_classes = _VEHICLE_CLASSES
+
     def export_yolo(self, image_path: str, annotations: List, output_dir: str) -> bool:
-        """匯出YOLO格式"""
+        """匯出YOLO格式（逐框字典的轉接層，內部走 SoA 路徑）"""
+        try:
+            # numpy 延遲匯入，讓無頭批次腳本匯入本模組時不必先付載入成本
+            import numpy as np
+
+            # 一次蒐集所有框為 SoA 陣列，避免逐框的直譯器開銷
+            arr = np.fromiter(
+                (value
+                 for rect in annotations
+                 for value in (rect['class'], *rect['bbox'])),
+                dtype=np.float64, count=len(annotations) * 5
+            ).reshape(-1, 5)
+
+            return self.export_yolo_soa(
+                image_path, arr[:, 1:5], arr[:, 0].astype(np.int64), output_dir
+            )
+        except Exception as e:
+            print(f"YOLO匯出錯誤: {e}")
+            return False
+
+    def export_yolo_soa(self, image_path: str, rects_xywh,
+                        class_ids, output_dir: str) -> bool:
+        """匯出YOLO格式（SoA 版本）
+
+        rects_xywh 為 (N, 4) 的 x/y/寬/高陣列，class_ids 為 (N,) 的類別
+        陣列；已持有陣列資料的呼叫端可以直接走這條路徑。
+        """
         try:
-            from PIL import Image
-            
             # 確保輸出目錄存在
             os.makedirs(output_dir, exist_ok=True)
-            
+
             # 取得圖片尺寸
-            img = Image.open(image_path)
-            img_width, img_height = img.size
-            
+            img_width, img_height = get_image_size(image_path)
+
             # 建立輸出檔案路徑
             base_name = os.path.splitext(os.path.basename(image_path))[0]
             output_path = os.path.join(output_dir, f"{base_name}.txt")
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                for rect in annotations:
-                    class_id = rect['class']
-                    x, y, w, h = rect['bbox']
-                    
-                    # 轉換為YOLO格式（中心點座標，相對尺寸）
-                    center_x = (x + w / 2) / img_width
-                    center_y = (y + h / 2) / img_height
-                    width = w / img_width
-                    height = h / img_height
-                    
-                    f.write(f"{class_id} {center_x:.12f} {center_y:.12f} {width:.12f} {height:.12f}\n")
-                    
+
+            # 向量化轉換為 YOLO 格式（中心點座標，相對尺寸）；
+            # 先取倒數，讓每個框的四次除法變成乘法
+            inv_w = 1.0 / img_width
+            inv_h = 1.0 / img_height
+            center_x = (rects_xywh[:, 0] + rects_xywh[:, 2] * 0.5) * inv_w
+            center_y = (rects_xywh[:, 1] + rects_xywh[:, 3] * 0.5) * inv_h
+            width = rects_xywh[:, 2] * inv_w
+            height = rects_xywh[:, 3] * inv_h
+
+            # 在 bytes 緩衝區組好全部內容後一次 os.write，
+            # 繞過文字編碼層與逐行緩衝
+            buf = bytearray()
+            for row in zip(class_ids.tolist(), center_x.tolist(),
+                           center_y.tolist(), width.tolist(), height.tolist()):
+                buf += _YOLO_LINE_FMT % row
+
+            fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.write(fd, buf)
+            finally:
+                os.close(fd)
+
             return True
         except Exception as e:
             print(f"YOLO匯出錯誤: {e}")
@@ -97,14 +160,11 @@ class AdvancedExporter:
             
             # 處理每張圖片
             for img_id, img_data in enumerate(images_data, 1):
-                from PIL import Image
-                
                 image_path = img_data['path']
                 annotations = img_data['annotations']
-                
+
                 # 取得圖片資訊
-                img = Image.open(image_path)
-                img_width, img_height = img.size
+                img_width, img_height = get_image_size(image_path)
                 
                 # 添加圖片資訊
                 coco_format["images"].append({
@@ -142,11 +202,8 @@ class AdvancedExporter:
     def export_pascal_voc(self, image_path: str, annotations: List, output_dir: str) -> bool:
         """匯出Pascal VOC格式"""
         try:
-            from PIL import Image
-            
             # 取得圖片資訊
-            img = Image.open(image_path)
-            img_width, img_height = img.size
+            img_width, img_height = get_image_size(image_path)
             img_depth = 3  # RGB
             
             # 建立XML結構
@@ -221,12 +278,9 @@ class AdvancedExporter:
     def export_json(self, image_path: str, annotations: List, output_dir: str) -> bool:
         """匯出JSON格式"""
         try:
-            from PIL import Image
-            
             # 取得圖片資訊
-            img = Image.open(image_path)
-            img_width, img_height = img.size
-            
+            img_width, img_height = get_image_size(image_path)
+
             # 建立JSON結構
             json_data = {
                 "image": {
@@ -249,8 +303,8 @@ class AdvancedExporter:
                 x, y, w, h = rect['bbox']
                 
                 # 計算精確的中心點座標（保持高精確度）
-                center_x = round(x + w / 2, 12)
-                center_y = round(y + h / 2, 12)
+                center_x = round(x + w * 0.5, 12)
+                center_y = round(y + h * 0.5, 12)
                 
                 annotation_data = {
                     "id": idx + 1,
@@ -344,6 +398,25 @@ class AdvancedExporter:
             print(f"報告生成錯誤: {e}")
             return False
     
+    def _export_parallel(self, images_data: List[Dict], output_dir: str,
+                         export_fn) -> int:
+        """以執行緒池並行執行逐圖匯出
+
+        匯出以檔案 I/O 為主（讀圖檔頭、寫標籤檔），執行緒在這些呼叫中
+        會釋放 GIL，因此可以有效重疊。回傳成功的圖片數。
+        """
+        # 先建好目錄，避免執行緒間競爭建立
+        os.makedirs(output_dir, exist_ok=True)
+
+        with ThreadPoolExecutor(max_workers=min(os.cpu_count() or 4, 8)) as pool:
+            results = pool.map(
+                lambda img_data: export_fn(
+                    img_data['path'], img_data['annotations'], output_dir
+                ),
+                images_data
+            )
+            return sum(1 for ok in results if ok)
+
     def batch_export(self, images_data: List[Dict], output_dir: str, formats: List[str]) -> Dict:
         """批次匯出多種格式"""
         results = {
@@ -381,27 +454,24 @@ class AdvancedExporter:
             
             try:
                 if fmt == 'YOLO':
-                    for img_data in images_data:
-                        if self.export_yolo(img_data['path'], img_data['annotations'], fmt_dir):
-                            success_count += 1
+                    success_count = self._export_parallel(
+                        images_data, fmt_dir, self.export_yolo)
                     # 匯出類別檔案
                     self.export_classes_file(fmt_dir)
-                    
+
                 elif fmt == 'COCO':
                     if self.export_coco(images_data, fmt_dir):
                         success_count = len(images_data)
-                    
+
                 elif fmt == 'Pascal VOC':
-                    for img_data in images_data:
-                        if self.export_pascal_voc(img_data['path'], img_data['annotations'], fmt_dir):
-                            success_count += 1
+                    success_count = self._export_parallel(
+                        images_data, fmt_dir, self.export_pascal_voc)
                     # 匯出類別檔案
                     self.export_classes_file(fmt_dir)
-                    
+
                 elif fmt == 'JSON':
-                    for img_data in images_data:
-                        if self.export_json(img_data['path'], img_data['annotations'], fmt_dir):
-                            success_count += 1
+                    success_count = self._export_parallel(
+                        images_data, fmt_dir, self.export_json)
                     # 匯出類別檔案
                     self.export_classes_file(fmt_dir)
                 
@@ -23,6 +23,53 @@ except ImportError:
     YOLO_AVAILABLE = False
     print("警告: YOLOv8未安裝，AI功能將被禁用")
 
+# Numba 為選用加速：IoU/重疊度等純數值內迴圈以 JIT 編譯
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Numba 不可用時的替身：函數維持純 Python 實作"""
+        def decorator(func):
+            return func
+        if args and callable(args[0]):
+            return args[0]
+        return decorator
+
+
+@njit(cache=True, fastmath=True)
+def _iou_core(x1, y1, w1, h1, x2, y2, w2, h2):
+    """IoU 數值核心 (有 Numba 時編譯為原生碼)"""
+    inter_x1 = max(x1, x2)
+    inter_y1 = max(y1, y2)
+    inter_x2 = min(x1 + w1, x2 + w2)
+    inter_y2 = min(y1 + h1, y2 + h2)
+
+    if inter_x2 <= inter_x1 or inter_y2 <= inter_y1:
+        return 0.0
+
+    inter_area = (inter_x2 - inter_x1) * (inter_y2 - inter_y1)
+    union_area = w1 * h1 + w2 * h2 - inter_area
+    return inter_area / union_area if union_area > 0 else 0.0
+
+
+@njit(cache=True, fastmath=True)
+def _overlap_core(x1, y1, w1, h1, x2, y2, w2, h2):
+    """重疊比例數值核心：交集面積 / 第一個框面積"""
+    inter_x1 = max(x1, x2)
+    inter_y1 = max(y1, y2)
+    inter_x2 = min(x1 + w1, x2 + w2)
+    inter_y2 = min(y1 + h1, y2 + h2)
+
+    if inter_x2 <= inter_x1 or inter_y2 <= inter_y1:
+        return 0.0
+
+    inter_area = (inter_x2 - inter_x1) * (inter_y2 - inter_y1)
+    area1 = w1 * h1
+    return inter_area / area1 if area1 > 0 else 0.0
+
 class AIPredictor(QThread):
     """AI預測執行緒"""
     prediction_completed = pyqtSignal(str, list)  # 圖片路徑, 預測結果
@@ -318,21 +365,8 @@ class SmartAnnotationOptimizer:
         try:
             x1, y1, w1, h1 = bbox1
             x2, y2, w2, h2 = bbox2
-            
-            # 計算交集
-            inter_x1 = max(x1, x2)
-            inter_y1 = max(y1, y2)
-            inter_x2 = min(x1 + w1, x2 + w2)
-            inter_y2 = min(y1 + h1, y2 + h2)
-            
-            if inter_x2 <= inter_x1 or inter_y2 <= inter_y1:
-                return 0.0
-            
-            inter_area = (inter_x2 - inter_x1) * (inter_y2 - inter_y1)
-            area1 = w1 * h1
-            
-            return inter_area / area1 if area1 > 0 else 0.0
-            
+            return _overlap_core(float(x1), float(y1), float(w1), float(h1),
+                                 float(x2), float(y2), float(w2), float(h2))
         except Exception:
             return 0.0
     
@@ -373,6 +407,32 @@ class SmartAnnotationOptimizer:
         except Exception:
             return False
 
+    @staticmethod
+    def calculate_iou_batch(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+        """以廣播一次計算 N×M 個框對的 IoU 矩陣
+
+        boxes_a/boxes_b 為 (N,4)/(M,4) 的 [x, y, w, h] 陣列。
+        """
+        a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+        b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+        
+        ax2, ay2 = a[:, 0] + a[:, 2], a[:, 1] + a[:, 3]
+        bx2, by2 = b[:, 0] + b[:, 2], b[:, 1] + b[:, 3]
+        
+        inter_x1 = np.maximum(a[:, 0, None], b[None, :, 0])
+        inter_y1 = np.maximum(a[:, 1, None], b[None, :, 1])
+        inter_x2 = np.minimum(ax2[:, None], bx2[None, :])
+        inter_y2 = np.minimum(ay2[:, None], by2[None, :])
+        
+        inter_w = np.clip(inter_x2 - inter_x1, 0, None)
+        inter_h = np.clip(inter_y2 - inter_y1, 0, None)
+        inter_area = inter_w * inter_h
+        
+        area_a = a[:, 2] * a[:, 3]
+        area_b = b[:, 2] * b[:, 3]
+        union_area = area_a[:, None] + area_b[None, :] - inter_area
+        return inter_area / (union_area + 1e-9)
+
     @staticmethod
     def filter_overlapping_predictions(predictions: List[Dict], iou_threshold: float = 0.5) -> List[Dict]:
         """過濾重疊的預測結果"""
@@ -382,48 +442,24 @@ class SmartAnnotationOptimizer:
         # 按信心度排序
         sorted_predictions = sorted(predictions, key=lambda x: x['confidence'], reverse=True)
         
-        filtered = []
-        for pred in sorted_predictions:
-            # 檢查是否與已選擇的預測重疊
-            is_duplicate = False
-            for selected in filtered:
-                if SmartAnnotationOptimizer.calculate_iou(pred['bbox'], selected['bbox']) > iou_threshold:
-                    is_duplicate = True
-                    break
-            
-            if not is_duplicate:
-                filtered.append(pred)
-                
-        return filtered
+        # IoU 矩陣一次算完，貪婪挑選時只查表
+        boxes = np.asarray([p['bbox'] for p in sorted_predictions], dtype=np.float64)
+        iou_matrix = SmartAnnotationOptimizer.calculate_iou_batch(boxes, boxes)
+        
+        keep = []
+        for i in range(len(sorted_predictions)):
+            if not keep or iou_matrix[i, keep].max() <= iou_threshold:
+                keep.append(i)
+        
+        return [sorted_predictions[i] for i in keep]
 
     @staticmethod
     def calculate_iou(box1: List[int], box2: List[int]) -> float:
         """計算兩個邊界框的IoU"""
-        x1_1, y1_1, w1, h1 = box1
-        x2_1 = x1_1 + w1
-        y2_1 = y1_1 + h1
-        
-        x1_2, y1_2, w2, h2 = box2
-        x2_2 = x1_2 + w2
-        y2_2 = y1_2 + h2
-        
-        # 計算交集區域
-        inter_x1 = max(x1_1, x1_2)
-        inter_y1 = max(y1_1, y1_2)
-        inter_x2 = min(x2_1, x2_2)
-        inter_y2 = min(y2_1, y2_2)
-        
-        if inter_x2 <= inter_x1 or inter_y2 <= inter_y1:
-            return 0.0
-            
-        inter_area = (inter_x2 - inter_x1) * (inter_y2 - inter_y1)
-        
-        # 計算聯集區域
-        area1 = w1 * h1
-        area2 = w2 * h2
-        union_area = area1 + area2 - inter_area
-        
-        return inter_area / union_area if union_area > 0 else 0.0
+        x1, y1, w1, h1 = box1
+        x2, y2, w2, h2 = box2
+        return _iou_core(float(x1), float(y1), float(w1), float(h1),
+                         float(x2), float(y2), float(w2), float(h2))
 
 
 class AIAssistant(QObject):
@@ -2,15 +2,264 @@
 AI預測結果對話框 - 顯示和管理AI預測結果
 """
 
+import functools
 import os
 from PyQt5.QtWidgets import (
-    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
-    QListWidget, QListWidgetItem, QCheckBox, QGroupBox,
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QListView, QStyledItemDelegate, QStyle, QCheckBox, QGroupBox,
     QProgressBar, QTextEdit, QSplitter, QWidget, QScrollArea,
-    QFrame, QButtonGroup, QRadioButton, QMessageBox
+    QFrame, QMessageBox
 )
-from PyQt5.QtCore import Qt, pyqtSignal, QSize
-from PyQt5.QtGui import QFont, QPixmap, QPainter, QPen, QColor, QBrush
+from PyQt5.QtCore import (
+    Qt, pyqtSignal, QSize, QRect, QObject, QRunnable, QThreadPool,
+    QTimer, QAbstractListModel, QModelIndex, QEvent
+)
+from PyQt5.QtGui import QFont, QFontMetrics, QPixmap, QPainter, QPen, QColor, QBrush, QPixmapCache, QImage
+
+# 預覽合成結果的全域快取上限 (KB)，約40MB
+QPixmapCache.setCacheLimit(40 * 1024)
+
+import numpy as np
+
+# Numba 為選用加速：預測數量大時以 JIT 批次分類信心度
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+
+    @njit(cache=True)
+    def _classify_confidences(confs):
+        out = np.empty(confs.size, np.int8)
+        for i in range(confs.size):
+            if confs[i] >= 0.8:
+                out[i] = 2
+            elif confs[i] >= 0.6:
+                out[i] = 1
+            else:
+                out[i] = 0
+        return out
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# 信心度分類碼對應的顏色 (低/中/高)
+CONFIDENCE_COLORS = ('#F44336', '#FF9800', '#4CAF50')
+
+# 說明對話框的靜態內容
+HELP_TEXT = """
+AI預測結果說明：
+
+🟢 綠色框: 已接受的預測
+🔴 紅色框: 已拒絕的預測  
+🔵 藍色框: 待決定的預測 (預設接受)
+
+操作說明：
+• 點選每個預測的「接受」或「拒絕」選項
+• 使用「全部接受」或「全部拒絕」快速操作
+• 勾選顯示選項控制預覽圖中顯示的內容
+• 點選預測項目查看詳細資訊
+
+信心度顏色：
+🟢 >= 80%: 高信心度
+🟠 60-80%: 中等信心度  
+🔴 < 60%: 低信心度
+
+提示：
+• 建議仔細檢查低信心度的預測
+• 已優化的預測框可能更準確
+"""
+
+# 批次分類的門檻：數量小時 Python 迴圈反而較快
+NUMBA_BATCH_THRESHOLD = 256
+
+@functools.lru_cache(maxsize=16)
+def _load_image_cached(path, mtime):
+    """讀取並解碼圖片，以 (路徑, 修改時間) 為鍵快取解碼結果"""
+    return QImage(path)
+
+
+class _ImageLoadSignals(QObject):
+    loaded = pyqtSignal(QImage)
+
+
+class _ImageLoadTask(QRunnable):
+    """在背景執行緒讀取並解碼圖片，避免阻塞對話框開啟"""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.signals = _ImageLoadSignals()
+
+    def run(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+            image = _load_image_cached(self.path, mtime)
+        except Exception as e:
+            print(f"載入圖片失敗: {e}")
+            image = QImage()
+        self.signals.loaded.emit(image)
+
+
+class PredictionListModel(QAbstractListModel):
+    """預測列表的輕量模型 - 每列只有一個QModelIndex，不建立QWidget"""
+
+    DecisionRole = Qt.UserRole + 1
+    ConfidenceRole = Qt.UserRole + 2
+
+    def __init__(self, dialog):
+        super().__init__(dialog)
+        self._dialog = dialog
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._dialog.predictions)
+
+    def data(self, index, role=Qt.DisplayRole):
+        row = index.row()
+        if not index.isValid() or row >= len(self._dialog.predictions):
+            return None
+
+        if role == Qt.DisplayRole:
+            return self._dialog.predictions[row]['class_name']
+        if role == self.ConfidenceRole:
+            return self._dialog.predictions[row].get('confidence', 0)
+        if role == self.DecisionRole:
+            return 'reject' if row in self._dialog.rejected_idx else 'accept'
+        return None
+
+    def reload(self):
+        """預測內容變更後重設模型"""
+        self.beginResetModel()
+        self.endResetModel()
+
+    def note_decision_changed(self, row):
+        """單列決策變更後通知視圖重繪該列"""
+        idx = self.index(row)
+        self.dataChanged.emit(idx, idx, [self.DecisionRole])
+
+    def refresh_decisions(self):
+        """整批決策變更後通知視圖重繪所有列"""
+        count = self.rowCount()
+        if count:
+            self.dataChanged.emit(self.index(0), self.index(count - 1),
+                                  [self.DecisionRole])
+
+
+class PredictionItemDelegate(QStyledItemDelegate):
+    """直接繪製預測列，省去每列約8個QObject與巢狀佈局的成本"""
+
+    ROW_HEIGHT = 90
+    DECISION_ZONE_WIDTH = 70
+
+    ACCEPT_BTN_COLOR = QColor(40, 167, 69)
+    REJECT_BTN_COLOR = QColor(220, 53, 69)
+    TEXT_COLOR = QColor(73, 80, 87)
+    MUTED_COLOR = QColor(102, 102, 102)
+    ACCENT_COLOR = QColor(0, 120, 212)
+
+    def __init__(self, dialog):
+        super().__init__(dialog)
+        self._dialog = dialog
+
+    def sizeHint(self, option, index):
+        return QSize(400, self.ROW_HEIGHT)
+
+    def _decision_rects(self, rect):
+        accept_rect = QRect(rect.left() + 8, rect.top() + 14,
+                            self.DECISION_ZONE_WIDTH - 12, 24)
+        reject_rect = QRect(rect.left() + 8, rect.top() + 48,
+                            self.DECISION_ZONE_WIDTH - 12, 24)
+        return accept_rect, reject_rect
+
+    def paint(self, painter, option, index):
+        painter.save()
+        rect = option.rect
+
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(rect, QColor(0, 120, 212, 38))
+
+        row = index.row()
+        pred = self._dialog.predictions[row]
+        _, _, conf_color = self._dialog._pred_cache[row]
+        decision = index.data(PredictionListModel.DecisionRole)
+
+        # 左側決策區: 當前決策填色高亮
+        accept_rect, reject_rect = self._decision_rects(rect)
+        font = painter.font()
+        font.setPointSize(9)
+        font.setBold(False)
+        painter.setFont(font)
+        for zone_rect, text, active, color in (
+                (accept_rect, '接受', decision == 'accept', self.ACCEPT_BTN_COLOR),
+                (reject_rect, '拒絕', decision == 'reject', self.REJECT_BTN_COLOR)):
+            if active:
+                painter.setPen(Qt.NoPen)
+                painter.setBrush(QBrush(color))
+                painter.drawRoundedRect(zone_rect, 4, 4)
+                painter.setPen(QColor(255, 255, 255))
+            else:
+                painter.setPen(self.TEXT_COLOR)
+            painter.drawText(zone_rect, Qt.AlignCenter, text)
+
+        # 分隔線
+        sep_x = rect.left() + self.DECISION_ZONE_WIDTH
+        painter.setPen(QColor(222, 226, 230))
+        painter.drawLine(sep_x, rect.top() + 8, sep_x, rect.bottom() - 8)
+
+        # 右側資訊區
+        info_left = sep_x + 12
+        info_width = rect.right() - info_left - 8
+
+        # 第一行：類別和信心度
+        line1 = QRect(info_left, rect.top() + 10, info_width, 20)
+        bold_font = painter.font()
+        bold_font.setBold(True)
+        painter.setFont(bold_font)
+        painter.setPen(self.ACCENT_COLOR)
+        painter.drawText(line1, Qt.AlignLeft | Qt.AlignVCenter,
+                         f"🚗 {pred['class_name']}")
+        painter.setPen(QColor(conf_color))
+        painter.drawText(line1, Qt.AlignRight | Qt.AlignVCenter,
+                         f"{pred.get('confidence', 0):.1%}")
+
+        # 第二行：位置資訊
+        normal_font = painter.font()
+        normal_font.setBold(False)
+        painter.setFont(normal_font)
+        bbox = pred['bbox']
+        line2 = QRect(info_left, rect.top() + 36, info_width, 16)
+        painter.setPen(self.MUTED_COLOR)
+        painter.drawText(line2, Qt.AlignLeft | Qt.AlignVCenter,
+                         f"位置: ({bbox[0]}, {bbox[1]}) 大小: {bbox[2]}×{bbox[3]}")
+
+        # 第三行：額外資訊（圖示和狀態）
+        extra_info = []
+        if pred.get('optimized', False):
+            extra_info.append('🔧 已優化')
+        if pred.get('source') == 'ai_prediction':
+            extra_info.append('🤖 AI預測')
+        if extra_info:
+            line3 = QRect(info_left, rect.top() + 58, info_width, 16)
+            painter.setPen(self.ACCENT_COLOR)
+            painter.drawText(line3, Qt.AlignLeft | Qt.AlignVCenter,
+                             ' | '.join(extra_info))
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        """以滑鼠點擊決策區取代每列的QRadioButton"""
+        if (event.type() == QEvent.MouseButtonRelease and
+                event.button() == Qt.LeftButton):
+            accept_rect, reject_rect = self._decision_rects(option.rect)
+            if accept_rect.contains(event.pos()):
+                self._dialog.on_prediction_decision(index.row(), 'accept', True)
+                model.note_decision_changed(index.row())
+                return True
+            if reject_rect.contains(event.pos()):
+                self._dialog.on_prediction_decision(index.row(), 'reject', True)
+                model.note_decision_changed(index.row())
+                return True
+        return super().editorEvent(event, model, option, index)
+
 
 # 導入樣式表
 try:
@@ -25,25 +274,75 @@ class PredictionResultDialog(QDialog):
     
     predictions_accepted = pyqtSignal(list)  # 接受的預測
     predictions_rejected = pyqtSignal(list)  # 拒絕的預測
+
+    # 共用的決策顏色與畫筆 - 避免每次重繪都重新建構
+    ACCEPT_COLOR = QColor(76, 175, 80)    # 綠色: 已接受
+    REJECT_COLOR = QColor(244, 67, 54)    # 紅色: 已拒絕
+    PENDING_COLOR = QColor(33, 150, 243)  # 藍色: 待決定 (預設是接受)
+    ACCEPT_PEN = QPen(ACCEPT_COLOR, 3)
+    REJECT_PEN = QPen(REJECT_COLOR, 3)
+    PENDING_PEN = QPen(PENDING_COLOR, 3)
     
     def __init__(self, image_path, predictions, image_pixmap=None, parent=None):
         super().__init__(parent)
         self.image_path = image_path
         self.predictions = predictions
         self.image_pixmap = image_pixmap
-        self.accepted_predictions = []
-        self.rejected_predictions = []
-        
-        # 如果沒有提供image_pixmap，嘗試載入圖片
+        # 以索引集合記錄決策，成員檢查為 O(1)
+        self.accepted_idx = set()
+        self.rejected_idx = set()
+
+        # SoA 排列：bbox 與信心度鏡像成連續陣列，
+        # 繪製迴圈以索引存取，不再每框查多次 dict
+        self._bbox_arr = np.array([p['bbox'] for p in predictions],
+                                  dtype=np.int32).reshape(-1, 4)
+        self._conf_arr = np.fromiter((p.get('confidence', 0) for p in predictions),
+                                     dtype=np.float32, count=len(predictions))
+
+        # 預先渲染的標籤小圖快取，鍵為 (標籤文字, 顏色)
+        self._label_pixmaps = {}
+
+        # 預先計算每個預測的標籤文字與信心度顏色，重繪時不再格式化字串
+        if NUMBA_AVAILABLE and len(predictions) >= NUMBA_BATCH_THRESHOLD:
+            colors = [CONFIDENCE_COLORS[c]
+                      for c in _classify_confidences(self._conf_arr)]
+        else:
+            colors = [self.get_confidence_color(p.get('confidence', 0))
+                      for p in predictions]
+
+        self._pred_cache = []
+        for pred, color in zip(predictions, colors):
+            confidence = pred.get('confidence', 0)
+            self._pred_cache.append((
+                pred['class_name'],
+                f"{pred['class_name']} {confidence:.1%}",
+                color,
+            ))
+
+        # 預覽縮放快取 - 避免每次更新都重新縮放整張圖片
+        self._scaled_base = None
+        self._base_image = None
+        self._base_is_smooth = False
+        self._scale_x = 1.0
+        self._scale_y = 1.0
+
+        # 互動期間用快速縮放，靜止 150ms 後再以平滑縮放重繪一次
+        self._smooth_timer = QTimer(self)
+        self._smooth_timer.setSingleShot(True)
+        self._smooth_timer.setInterval(150)
+        self._smooth_timer.timeout.connect(self._repaint_smooth)
+
+        # 以 0 間隔的單發計時器，把同一事件迴圈內的多次決策更新合併為一次
+        self._coalesce_timer = QTimer(self)
+        self._coalesce_timer.setSingleShot(True)
+        self._coalesce_timer.setInterval(0)
+        self._coalesce_timer.timeout.connect(self._flush_updates)
+
+        # 如果沒有提供image_pixmap，改由背景執行緒載入，先顯示佔位文字
+        self._load_task = None
         if self.image_pixmap is None and os.path.exists(self.image_path):
-            try:
-                self.image_pixmap = QPixmap(self.image_path)
-                if self.image_pixmap.isNull():
-                    self.image_pixmap = None
-                    print(f"警告: 無法載入圖片 {self.image_path}")
-            except Exception as e:
-                self.image_pixmap = None
-                print(f"載入圖片失敗: {e}")
+            self._load_task = _ImageLoadTask(self.image_path)
+            self._load_task.signals.loaded.connect(self._on_image_loaded)
         
         self.setWindowTitle(f'AI預測結果 - {os.path.basename(image_path)}')
         self.setMinimumSize(800, 600)
@@ -74,7 +373,7 @@ class PredictionResultDialog(QDialog):
                     background-color: #228be6;
                 }
                 
-                QListWidget {
+                QListView {
                     background-color: white;
                     border: 1px solid #dee2e6;
                     border-radius: 6px;
@@ -93,6 +392,21 @@ class PredictionResultDialog(QDialog):
         self.setup_ui()
         self.load_predictions()
 
+        if self._load_task is not None:
+            QThreadPool.globalInstance().start(self._load_task)
+
+    def _on_image_loaded(self, image):
+        """背景載入完成後套用圖片並重繪預覽"""
+        self._load_task = None
+        if image.isNull():
+            print(f"警告: 無法載入圖片 {self.image_path}")
+            self.image_label.setText(f'無法載入圖片預覽\n{os.path.basename(self.image_path)}')
+            return
+
+        self.image_pixmap = QPixmap.fromImage(image)
+        self._scaled_base = None
+        self.update_image_preview()
+
     def setup_ui(self):
         layout = QVBoxLayout(self)
         
@@ -303,20 +617,11 @@ class PredictionResultDialog(QDialog):
         # 如果有圖片，顯示預覽 (現在checkbox已經創建了)
         if self.image_pixmap and not self.image_pixmap.isNull():
             self.update_image_preview()
+        elif self._load_task is not None:
+            # 背景載入中，先顯示佔位文字
+            self.image_label.setText('載入中…')
         else:
-            # 嘗試直接載入圖片檔案作為備用
-            if os.path.exists(self.image_path):
-                try:
-                    backup_pixmap = QPixmap(self.image_path)
-                    if not backup_pixmap.isNull():
-                        self.image_pixmap = backup_pixmap
-                        self.update_image_preview()
-                    else:
-                        self.image_label.setText(f'無法載入圖片預覽\n{os.path.basename(self.image_path)}')
-                except Exception as e:
-                    self.image_label.setText(f'圖片載入失敗\n{os.path.basename(self.image_path)}\n{str(e)}')
-            else:
-                self.image_label.setText(f'圖片檔案不存在\n{os.path.basename(self.image_path)}')
+            self.image_label.setText(f'圖片檔案不存在\n{os.path.basename(self.image_path)}')
         
         layout.addWidget(image_container)
         
@@ -334,29 +639,27 @@ class PredictionResultDialog(QDialog):
         list_label.setFont(list_font)
         layout.addWidget(list_label)
         
-        # 預測列表
-        self.predictions_list = QListWidget()
-        self.predictions_list.currentItemChanged.connect(self.on_prediction_selected)
+        # 預測列表 - 模型+委派直接繪製，不為每列建立QWidget
+        self.prediction_model = PredictionListModel(self)
+        self.predictions_list = QListView()
+        self.predictions_list.setModel(self.prediction_model)
+        self.predictions_list.setItemDelegate(PredictionItemDelegate(self))
+        self.predictions_list.setUniformItemSizes(True)
+        self.predictions_list.selectionModel().currentChanged.connect(
+            self.on_prediction_selected)
         # 設定列表樣式，確保項目有足夠空間
         self.predictions_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background-color: white;
                 border: 1px solid #dee2e6;
                 border-radius: 6px;
                 selection-background-color: rgba(0, 120, 212, 0.1);
             }
-            QListWidget::item {
+            QListView::item {
                 border-bottom: 1px solid #f8f9fa;
                 padding: 2px;
             }
-            QListWidget::item:selected {
-                background-color: rgba(0, 120, 212, 0.15);
-                border: 1px solid rgba(0, 120, 212, 0.3);
-                border-radius: 4px;
-            }
         """)
-        # 設定行高，確保內容不被壓縮
-        self.predictions_list.setUniformItemSizes(False)
         layout.addWidget(self.predictions_list)
         
         # 詳細資訊
@@ -401,182 +704,9 @@ class PredictionResultDialog(QDialog):
 
     def load_predictions(self):
         """載入預測到列表"""
-        self.predictions_list.clear()
-        
-        for i, pred in enumerate(self.predictions):
-            item = QListWidgetItem()
-            
-            # 創建自訂widget
-            widget = self.create_prediction_item_widget(i, pred)
-            
-            # 確保item有足夠的高度來顯示完整內容
-            widget_height = max(widget.sizeHint().height(), 90)
-            item.setSizeHint(QSize(400, widget_height))
-            
-            self.predictions_list.addItem(item)
-            self.predictions_list.setItemWidget(item, widget)
-        
+        self.prediction_model.reload()
         self.update_stats()
 
-    def create_prediction_item_widget(self, index, prediction):
-        """創建預測項目widget"""
-        widget = QWidget()
-        layout = QHBoxLayout(widget)
-        layout.setContentsMargins(8, 8, 8, 8)  # 增加邊距
-        layout.setSpacing(10)  # 增加組件間距
-        
-        # 設定widget最小高度，避免內容被壓縮
-        widget.setMinimumHeight(90)
-        
-        # 左側：選擇按鈕組（垂直排列）
-        button_widget = QWidget()
-        button_layout = QVBoxLayout(button_widget)
-        button_layout.setContentsMargins(0, 0, 0, 0)
-        button_layout.setSpacing(5)
-        
-        button_group = QButtonGroup(widget)
-        
-        accept_rb = QRadioButton('接受')
-        accept_rb.setChecked(True)  # 預設接受
-        accept_rb.toggled.connect(lambda checked, idx=index: self.on_prediction_decision(idx, 'accept', checked))
-        # 設定按鈕樣式，確保文字不被切割
-        accept_rb.setStyleSheet("""
-            QRadioButton {
-                font-size: 12px;
-                padding: 3px;
-                spacing: 5px;
-            }
-            QRadioButton::indicator {
-                width: 16px;
-                height: 16px;
-            }
-        """)
-        button_group.addButton(accept_rb)
-        button_layout.addWidget(accept_rb)
-        
-        reject_rb = QRadioButton('拒絕')
-        reject_rb.toggled.connect(lambda checked, idx=index: self.on_prediction_decision(idx, 'reject', checked))
-        reject_rb.setStyleSheet("""
-            QRadioButton {
-                font-size: 12px;
-                padding: 3px;
-                spacing: 5px;
-            }
-            QRadioButton::indicator {
-                width: 16px;
-                height: 16px;
-            }
-        """)
-        button_group.addButton(reject_rb)
-        button_layout.addWidget(reject_rb)
-        
-        button_layout.addStretch()
-        button_widget.setFixedWidth(70)  # 固定寬度，確保按鈕不被壓縮
-        layout.addWidget(button_widget)
-        
-        # 分隔線
-        separator = QFrame()
-        separator.setFrameShape(QFrame.VLine)
-        separator.setFrameShadow(QFrame.Sunken)
-        separator.setStyleSheet("QFrame { color: #dee2e6; }")
-        layout.addWidget(separator)
-        
-        # 右側：預測資訊
-        info_widget = QWidget()
-        info_layout = QVBoxLayout(info_widget)
-        info_layout.setContentsMargins(0, 0, 0, 0)
-        info_layout.setSpacing(6)  # 增加行間距
-        
-        # 第一行：類別和信心度
-        class_conf_layout = QHBoxLayout()
-        class_conf_layout.setContentsMargins(0, 0, 0, 0)
-        
-        # 車輛圖示和類別名稱
-        class_label = QLabel(f"🚗 {prediction['class_name']}")
-        class_label.setStyleSheet("""
-            QLabel {
-                font-weight: bold; 
-                color: #0078d4;
-                font-size: 13px;
-                padding: 2px 0px;
-            }
-        """)
-        # 確保標籤有足夠空間顯示
-        class_label.setMinimumHeight(20)
-        class_label.setSizePolicy(class_label.sizePolicy().Expanding, class_label.sizePolicy().Preferred)
-        class_conf_layout.addWidget(class_label)
-        
-        class_conf_layout.addStretch()
-        
-        # 信心度標籤
-        confidence = prediction.get('confidence', 0)
-        conf_label = QLabel(f"{confidence:.1%}")
-        conf_color = self.get_confidence_color(confidence)
-        conf_label.setStyleSheet(f"""
-            QLabel {{
-                color: {conf_color}; 
-                font-weight: bold;
-                font-size: 13px;
-                padding: 2px 4px;
-                border-radius: 3px;
-                background-color: rgba(255, 255, 255, 0.8);
-            }}
-        """)
-        conf_label.setMinimumHeight(20)
-        conf_label.setFixedWidth(60)  # 固定寬度避免被壓縮
-        class_conf_layout.addWidget(conf_label)
-        
-        info_layout.addLayout(class_conf_layout)
-        
-        # 第二行：位置資訊
-        bbox = prediction['bbox']
-        pos_text = f"位置: ({bbox[0]}, {bbox[1]}) 大小: {bbox[2]}×{bbox[3]}"
-        pos_label = QLabel(pos_text)
-        pos_label.setStyleSheet("""
-            QLabel {
-                color: #666666; 
-                font-size: 11px;
-                padding: 1px 0px;
-            }
-        """)
-        pos_label.setMinimumHeight(16)
-        pos_label.setWordWrap(True)  # 允許換行
-        info_layout.addWidget(pos_label)
-        
-        # 第三行：額外資訊（圖示和狀態）
-        extra_info = []
-        if prediction.get('optimized', False):
-            extra_info.append('🔧 已優化')
-        if prediction.get('source') == 'ai_prediction':
-            extra_info.append('🤖 AI預測')
-        
-        if extra_info:
-            extra_label = QLabel(' | '.join(extra_info))
-            extra_label.setStyleSheet("""
-                QLabel {
-                    color: #0078d4; 
-                    font-size: 11px;
-                    padding: 2px 0px;
-                }
-            """)
-            extra_label.setMinimumHeight(16)
-            extra_label.setWordWrap(True)
-            info_layout.addWidget(extra_label)
-        else:
-            # 如果沒有額外資訊，添加一個空的佔位符保持佈局一致
-            spacer_label = QLabel("")
-            spacer_label.setMinimumHeight(16)
-            info_layout.addWidget(spacer_label)
-        
-        layout.addWidget(info_widget, 1)  # 給予彈性空間
-        
-        # 儲存決策狀態
-        widget.prediction_index = index
-        widget.accept_button = accept_rb
-        widget.reject_button = reject_rb
-        
-        return widget
-
     def get_confidence_color(self, confidence):
         """根據信心度獲取顏色"""
         if confidence >= 0.8:
@@ -591,32 +721,29 @@ class PredictionResultDialog(QDialog):
         if not checked:
             return
             
-        prediction = self.predictions[index]
-        
         if decision == 'accept':
-            if prediction in self.rejected_predictions:
-                self.rejected_predictions.remove(prediction)
-            if prediction not in self.accepted_predictions:
-                self.accepted_predictions.append(prediction)
+            self.rejected_idx.discard(index)
+            self.accepted_idx.add(index)
         else:  # reject
-            if prediction in self.accepted_predictions:
-                self.accepted_predictions.remove(prediction)
-            if prediction not in self.rejected_predictions:
-                self.rejected_predictions.append(prediction)
-        
+            self.accepted_idx.discard(index)
+            self.rejected_idx.add(index)
+
+        # 延後到事件迴圈尾端一次更新，避免連續切換時重複重繪
+        self._coalesce_timer.start()
+
+    def _flush_updates(self):
+        """合併後的統計與預覽更新"""
         self.update_stats()
         self.update_image_preview()
 
     def on_prediction_selected(self, current, previous):
         """處理預測選擇"""
-        if current is None:
+        if not current.isValid():
             return
-            
-        # 獲取對應的預測
-        row = self.predictions_list.row(current)
+
+        row = current.row()
         if 0 <= row < len(self.predictions):
-            prediction = self.predictions[row]
-            self.show_prediction_details(prediction)
+            self.show_prediction_details(self.predictions[row])
 
     def show_prediction_details(self, prediction):
         """顯示預測詳細資訊"""
@@ -635,113 +762,211 @@ class PredictionResultDialog(QDialog):
         
         self.details_text.setPlainText('\n'.join(details))
 
-    def update_image_preview(self):
-        """更新圖片預覽 - 固定大小，防止亂動"""
-        if not self.image_pixmap:
+    def _ensure_scaled_base(self, smooth=False):
+        """確保縮放後的底圖快取存在
+
+        昂貴的縮放只在快取失效時執行一次，之後的預覽更新直接複製
+        已縮放的底圖並在其上繪製預測框。互動期間以 FastTransformation
+        重建以求即時回饋，平滑版本由 _smooth_timer 延後補上。
+        """
+        if self._scaled_base is not None and (self._base_is_smooth or not smooth):
             return
-            
-        # 複製原圖
-        preview_pixmap = self.image_pixmap.copy()
-        painter = QPainter(preview_pixmap)
-        
-        # 繪製預測框
-        for pred in self.predictions:
-            should_draw = False
-            color = QColor(255, 255, 255)
-            
-            if pred in self.accepted_predictions and self.show_accepted_cb.isChecked():
-                should_draw = True
-                color = QColor(76, 175, 80)  # 綠色
-            elif pred in self.rejected_predictions and self.show_rejected_cb.isChecked():
-                should_draw = True
-                color = QColor(244, 67, 54)  # 紅色
-            elif (pred not in self.accepted_predictions and 
-                  pred not in self.rejected_predictions and 
-                  self.show_accepted_cb.isChecked()):  # 預設是接受
-                should_draw = True
-                color = QColor(33, 150, 243)  # 藍色
-            
-            if should_draw:
-                self.draw_prediction_box(painter, pred, color)
-        
-        painter.end()
-        
+
         # 固定縮放圖片到指定大小（400x300），保持縱橫比，防止亂動
         target_size = QSize(400, 300)
-        scaled_pixmap = preview_pixmap.scaled(
+        mode = Qt.SmoothTransformation if smooth else Qt.FastTransformation
+        self._scaled_base = self.image_pixmap.scaled(
             target_size,
-            Qt.KeepAspectRatio, 
-            Qt.SmoothTransformation
+            Qt.KeepAspectRatio,
+            mode
         )
-        
+        self._base_is_smooth = smooth
+        # 以預乘 ARGB32 的 QImage 作為繪製緩衝，複製與繪製時
+        # 不會觸發 Qt 的隱式格式轉換
+        self._base_image = self._scaled_base.toImage().convertToFormat(
+            QImage.Format_ARGB32_Premultiplied)
+        self._scale_x = self._scaled_base.width() / self.image_pixmap.width()
+        self._scale_y = self._scaled_base.height() / self.image_pixmap.height()
+
+        if not smooth:
+            self._smooth_timer.start()
+
+    def _repaint_smooth(self):
+        """互動靜止後以平滑縮放重建底圖並重繪一次"""
+        if not self.image_pixmap:
+            return
+        self._scaled_base = None
+        self._ensure_scaled_base(smooth=True)
+        self.update_image_preview()
+
+    def _preview_cache_key(self):
+        """產生目前決策狀態對應的預覽快取鍵"""
+        accepted = tuple(sorted(self.accepted_idx))
+        rejected = tuple(sorted(self.rejected_idx))
+
+        flags = (self.show_accepted_cb.isChecked(),
+                 self.show_rejected_cb.isChecked(),
+                 self.show_confidence_cb.isChecked(),
+                 self._base_is_smooth)
+        return f'pred_preview:{self.image_path}:{accepted}:{rejected}:{flags}'
+
+    def update_image_preview(self):
+        """更新圖片預覽 - 固定大小，防止亂動"""
+        if not self.image_pixmap:
+            return
+
+        # 先確定底圖狀態，快取鍵需要包含目前的縮放品質
+        self._ensure_scaled_base()
+
+        # 相同決策狀態的合成結果直接從快取取回，不重新繪製
+        cache_key = self._preview_cache_key()
+        cached = QPixmapCache.find(cache_key)
+        if cached is not None and not cached.isNull():
+            self.image_label.setPixmap(cached)
+            return
+
+        # 只複製已縮放的底圖緩衝，避免每次更新都複製並縮放原圖
+        scratch_image = self._base_image.copy()
+        image_rect = scratch_image.rect()
+        painter = QPainter(scratch_image)
+        # 軸對齊的不透明矩形不需要反鋸齒，關閉以走 raster 快速路徑
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        painter.setRenderHint(QPainter.TextAntialiasing, True)
+
+        # 依顏色分組預測框，矩形以單次 drawRects 批次繪製
+        color_groups = (
+            (self.ACCEPT_COLOR, self.ACCEPT_PEN, []),
+            (self.REJECT_COLOR, self.REJECT_PEN, []),
+            (self.PENDING_COLOR, self.PENDING_PEN, []),
+        )
+        label_items = []
+
+        show_accepted = self.show_accepted_cb.isChecked()
+        show_rejected = self.show_rejected_cb.isChecked()
+
+        for i in range(len(self.predictions)):
+            if i in self.accepted_idx:
+                group = 0 if show_accepted else -1
+            elif i in self.rejected_idx:
+                group = 1 if show_rejected else -1
+            else:
+                group = 2 if show_accepted else -1
+            if group < 0:
+                continue
+
+            # 零面積或完全落在圖片外的框直接剔除，省下繪製成本
+            rect = self._scaled_bbox_rect(i)
+            if rect.width() <= 0 or rect.height() <= 0 or (rect & image_rect).isEmpty():
+                continue
+
+            color, pen, rects = color_groups[group]
+            rects.append(rect)
+            label_items.append((i, color, rect))
+
+        # 每種顏色只設定一次畫筆
+        for color, pen, rects in color_groups:
+            if rects:
+                painter.setPen(pen)
+                painter.drawRects(rects)
+
+        # 第二趟貼上預先渲染的標籤小圖
+        for i, color, rect in label_items:
+            self.draw_prediction_label(painter, i, color, rect)
+
+        painter.end()
+
+        preview_pixmap = QPixmap.fromImage(scratch_image)
+        QPixmapCache.insert(cache_key, preview_pixmap)
+
         # 確保圖片始終居中顯示，不會因為選項改變而移動
-        self.image_label.setPixmap(scaled_pixmap)
+        self.image_label.setPixmap(preview_pixmap)
 
-    def draw_prediction_box(self, painter, prediction, color):
-        """繪製預測框"""
-        bbox = prediction['bbox']
-        x, y, w, h = bbox
-        
-        # 設定畫筆
-        pen = QPen(color, 3)
-        painter.setPen(pen)
-        
-        # 繪製矩形
-        painter.drawRect(x, y, w, h)
-        
-        # 繪製標籤
+    def resizeEvent(self, event):
+        """視窗大小改變時使縮放快取失效"""
+        self._scaled_base = None
+        super().resizeEvent(event)
+        if self.image_pixmap:
+            self.update_image_preview()
+
+    def _scaled_bbox_rect(self, index):
+        """將原圖座標的 bbox 換算為縮放後底圖上的 QRect"""
+        x, y, w, h = self._bbox_arr[index]
+        return QRect(int(x * self._scale_x),
+                     int(y * self._scale_y),
+                     int(w * self._scale_x),
+                     int(h * self._scale_y))
+
+    def _label_pixmap(self, index, color):
+        """取得 (必要時渲染並快取) 預測標籤的小型 QPixmap
+
+        相同 (文字, 顏色) 的標籤只做一次字體量測、填色與文字排版，
+        之後的重繪都是單次 drawPixmap。
+        """
+        label_plain, label_with_conf, _ = self._pred_cache[index]
         if self.show_confidence_cb.isChecked():
-            confidence = prediction.get('confidence', 0)
-            label_text = f"{prediction['class_name']} {confidence:.1%}"
+            label_text = label_with_conf
         else:
-            label_text = prediction['class_name']
-        
-        # 設定字體
-        font = painter.font()
-        font.setPointSize(12)  # 增大字體
+            label_text = label_plain
+
+        key = (label_text, color.name())
+        cached = self._label_pixmaps.get(key)
+        if cached is not None:
+            return cached
+
+        font = QFont()
+        font.setPointSize(9)  # 繪製在縮放後的底圖上，使用較小字體
         font.setBold(True)
-        painter.setFont(font)
-        
-        # 計算標籤尺寸
-        font_metrics = painter.fontMetrics()
-        text_width = font_metrics.horizontalAdvance(label_text)
-        text_height = font_metrics.height()
-        
+        metrics = QFontMetrics(font)
+
         # 標籤邊距
         padding = 6
-        label_width = text_width + padding * 2
-        label_height = text_height + padding
-        
-        # 計算標籤位置 (確保在圖片範圍內)
-        label_x = max(0, min(x, self.image_pixmap.width() - label_width))
-        label_y = max(label_height, y)  # 確保標籤不會超出圖片上邊界
-        
-        # 如果標籤會超出邊界框下方，則放在邊界框內部
-        if label_y > y + h:
-            label_y = y + label_height
-        
-        # 標籤背景矩形
-        label_rect = painter.boundingRect(
-            label_x, label_y - label_height, 
-            label_width, label_height, 
-            Qt.AlignCenter, label_text
-        )
-        
-        # 繪製標籤背景
+        width = metrics.horizontalAdvance(label_text) + padding * 2
+        height = metrics.height() + padding
+
+        pixmap = QPixmap(width, height)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        painter.setRenderHint(QPainter.TextAntialiasing, True)
+        painter.setFont(font)
+        label_rect = QRect(0, 0, width - 1, height - 1)
+
+        # 標籤背景以 Source 模式直接覆寫，省去逐像素 alpha 混合
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
         painter.fillRect(label_rect, QBrush(color))
-        
-        # 繪製標籤邊框
+        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+
+        # 標籤邊框與文字
         painter.setPen(QPen(QColor(255, 255, 255), 1))
         painter.drawRect(label_rect)
-        
-        # 繪製標籤文字
         painter.setPen(QPen(QColor(255, 255, 255), 2))
         painter.drawText(label_rect, Qt.AlignCenter, label_text)
+        painter.end()
+
+        self._label_pixmaps[key] = pixmap
+        return pixmap
+
+    def draw_prediction_label(self, painter, index, color, rect):
+        """將預先渲染的標籤小圖貼到預測框上方"""
+        label_pixmap = self._label_pixmap(index, color)
+        x, y, h = rect.x(), rect.y(), rect.height()
+        label_width = label_pixmap.width()
+        label_height = label_pixmap.height()
+
+        # 計算標籤位置 (確保在圖片範圍內)
+        label_x = max(0, min(x, self._scaled_base.width() - label_width))
+        label_y = max(label_height, y)  # 確保標籤不會超出圖片上邊界
+
+        # 如果標籤會超出邊界框下方，則放在邊界框內部
+        if label_y > y + h:
+            label_y = y + label_height
+
+        painter.drawPixmap(label_x, label_y - label_height, label_pixmap)
 
     def update_stats(self):
         """更新統計資訊"""
-        accepted_count = len(self.accepted_predictions)
-        rejected_count = len(self.rejected_predictions)
+        accepted_count = len(self.accepted_idx)
+        rejected_count = len(self.rejected_idx)
         pending_count = len(self.predictions) - accepted_count - rejected_count
         
         # 預設未決定的都算作接受
@@ -749,77 +974,47 @@ class PredictionResultDialog(QDialog):
         
         self.stats_label.setText(f'統計: {total_accepted} 接受, {rejected_count} 拒絕')
 
-    def accept_all_predictions(self):
-        """接受所有預測"""
-        self.accepted_predictions = self.predictions.copy()
-        self.rejected_predictions.clear()
-        
-        # 更新UI
-        for i in range(self.predictions_list.count()):
-            item = self.predictions_list.item(i)
-            widget = self.predictions_list.itemWidget(item)
-            if widget:
-                widget.accept_button.setChecked(True)
-        
+    def _set_all_decisions(self, accept):
+        """批次設定所有預測的決策，整批只重繪一次"""
+        all_idx = set(range(len(self.predictions)))
+        if accept:
+            self.accepted_idx = all_idx
+            self.rejected_idx = set()
+        else:
+            self.rejected_idx = all_idx
+            self.accepted_idx = set()
+
+        self.prediction_model.refresh_decisions()
         self.update_stats()
         self.update_image_preview()
 
+    def accept_all_predictions(self):
+        """接受所有預測"""
+        self._set_all_decisions(accept=True)
+
     def reject_all_predictions(self):
         """拒絕所有預測"""
-        self.rejected_predictions = self.predictions.copy()
-        self.accepted_predictions.clear()
-        
-        # 更新UI
-        for i in range(self.predictions_list.count()):
-            item = self.predictions_list.item(i)
-            widget = self.predictions_list.itemWidget(item)
-            if widget:
-                widget.reject_button.setChecked(True)
-        
-        self.update_stats()
-        self.update_image_preview()
+        self._set_all_decisions(accept=False)
 
     def show_help(self):
-        """顯示說明"""
-        help_text = """
-AI預測結果說明：
+        """顯示說明 (對話框只建構一次，之後重複使用)"""
+        if not hasattr(self, '_help_box'):
+            self._help_box = QMessageBox(self)
+            self._help_box.setWindowTitle('說明')
+            self._help_box.setText(HELP_TEXT)
+            self._help_box.setIcon(QMessageBox.Information)
+            # 設定對話框最小尺寸，避免文字被切割
+            self._help_box.setMinimumSize(400, 300)
 
-🟢 綠色框: 已接受的預測
-🔴 紅色框: 已拒絕的預測  
-🔵 藍色框: 待決定的預測 (預設接受)
-
-操作說明：
-• 點選每個預測的「接受」或「拒絕」選項
-• 使用「全部接受」或「全部拒絕」快速操作
-• 勾選顯示選項控制預覽圖中顯示的內容
-• 點選預測項目查看詳細資訊
-
-信心度顏色：
-🟢 >= 80%: 高信心度
-🟠 60-80%: 中等信心度  
-🔴 < 60%: 低信心度
-
-提示：
-• 建議仔細檢查低信心度的預測
-• 已優化的預測框可能更準確
-        """
-        
-        msg = QMessageBox(self)
-        msg.setWindowTitle('說明')
-        msg.setText(help_text)
-        msg.setIcon(QMessageBox.Information)
-        # 設定對話框最小尺寸，避免文字被切割
-        msg.setMinimumSize(400, 300)
-        msg.exec_()
+        self._help_box.exec_()
 
     def apply_selections(self):
         """套用選擇"""
-        # 處理未決定的預測 (預設為接受)
+        # 處理未決定的預測 (預設為接受)，單趟依索引分流
         final_accepted = []
         final_rejected = []
-        
-        for pred in self.predictions:
-            if pred in self.rejected_predictions:
+        for i, pred in enumerate(self.predictions):
+            if i in self.rejected_idx:
                 final_rejected.append(pred)
             else:
                 # 未明確拒絕的都當作接受
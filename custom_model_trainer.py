@@ -4,12 +4,15 @@
 支援資料集分割、訓練監控、模型評估等專業功能
 """
 
+import functools
 import os
 import sys
 import yaml
 import json
 import shutil
-import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Callable
@@ -37,6 +40,122 @@ except ImportError:
     print("警告：matplotlib/seaborn 未安裝，部分視覺化功能不可用")
 
 
+# 支援的圖片格式
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'})
+
+# orjson 為選用加速：缺少時退回 stdlib json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 優先使用 libyaml 的 C dumper，比純 Python dumper 快 5-10 倍
+YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+
+def _write_json_atomic(path: Path, obj: Dict):
+    """序列化 JSON 並以暫存檔 + os.replace 原子性寫入"""
+    if ORJSON_AVAILABLE:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        data = json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+    
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+# PyTurboJPEG 為選用加速：JPEG 解碼走 libjpeg-turbo 的 SIMD 路徑
+try:
+    from turbojpeg import TurboJPEG
+    _TURBO = TurboJPEG()
+except Exception:
+    _TURBO = None
+
+
+def _decode_image(path: Path) -> Optional[np.ndarray]:
+    """解碼單張影像，JPEG 優先使用 libjpeg-turbo，其餘退回 cv2"""
+    if _TURBO is not None and path.suffix.lower() in ('.jpg', '.jpeg'):
+        try:
+            with open(path, 'rb') as f:
+                return _TURBO.decode(f.read())
+        except Exception:
+            pass
+    return cv2.imread(str(path))
+
+
+# 類別直方圖的安全上限
+MAX_CLASSES = 1024
+
+
+@contextmanager
+def _dataloader_defaults(persistent_workers: bool = True,
+                         pin_memory: bool = True,
+                         prefetch_factor: int = 4):
+    """暫時調整 torch DataLoader 的預設載入參數
+
+    Ultralytics 在內部建構 DataLoader，未暴露這幾個參數；
+    訓練期間以包裝過的 __init__ 補上預設值，結束後還原。
+    """
+    if not ULTRALYTICS_AVAILABLE:
+        yield
+        return
+    
+    from torch.utils.data import DataLoader
+    original_init = DataLoader.__init__
+    
+    def patched_init(self, *args, **kwargs):
+        # persistent_workers/prefetch_factor 只在有 worker 時合法
+        if kwargs.get('num_workers', 0) > 0:
+            kwargs.setdefault('persistent_workers', persistent_workers)
+            kwargs.setdefault('prefetch_factor', prefetch_factor)
+        kwargs.setdefault('pin_memory', pin_memory)
+        original_init(self, *args, **kwargs)
+    
+    DataLoader.__init__ = patched_init
+    try:
+        yield
+    finally:
+        DataLoader.__init__ = original_init
+
+# Numba 為選用加速：統計階段的標註解析可走 JIT 位元組解析器
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+
+    @njit(cache=True)
+    def _parse_labels(buf):
+        """走訪標註檔位元組，回傳 (標註行數, 類別直方圖)"""
+        hist = np.zeros(MAX_CLASSES, np.int64)
+        n_lines = 0
+        i = 0
+        n = buf.size
+        while i < n:
+            # 跳過空白與換行
+            while i < n and (buf[i] == 32 or buf[i] == 9 or
+                             buf[i] == 13 or buf[i] == 10):
+                i += 1
+            if i >= n:
+                break
+            # 讀取行首的類別 id
+            class_id = 0
+            valid = False
+            while i < n and 48 <= buf[i] <= 57:
+                class_id = class_id * 10 + (buf[i] - 48)
+                i += 1
+                valid = True
+            if valid and class_id < MAX_CLASSES:
+                hist[class_id] += 1
+                n_lines += 1
+            # 跳到下一行
+            while i < n and buf[i] != 10:
+                i += 1
+        return n_lines, hist
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
 @dataclass
 class TrainingConfig:
     """訓練配置參數"""
@@ -46,6 +165,7 @@ class TrainingConfig:
     
     # 資料集設定
     dataset_name: str = "vehicle_dataset"
+    classes: Optional[List[str]] = None  # 指定類別清單，None 時自動載入
     train_ratio: float = 0.7
     val_ratio: float = 0.2
     test_ratio: float = 0.1
@@ -60,20 +180,34 @@ class TrainingConfig:
     optimizer: str = "AdamW"
     weight_decay: float = 0.0005
     momentum: float = 0.937
+    amp: bool = True  # 混合精度訓練 (Ampere+ 可走 BF16/TF32 路徑)
+    compile: bool = False  # torch.compile 圖編譯，暖機一次換取每步加速
     
     # 數據增強
     augmentation: bool = True
     mixup: float = 0.1
     copy_paste: float = 0.3
+    # 增強啟用位元遮罩 (bit0=mixup, bit1=copy_paste, bit2=augmentation)，
+    # 讓下游以單一分支跳過強度為 0 的轉換
+    augment_mask: int = 0b111
     
     # 硬體設定
     device: str = "auto"  # auto, cpu, cuda
-    workers: int = 8
+    workers: int = 8  # <= 0 時依硬體自動偵測
+    
+    # 資料載入管線
+    persistent_workers: bool = True  # 跨 epoch 重用 worker，免除重新 fork
+    pin_memory: bool = True  # 鎖頁記憶體，啟用非同步 H2D 傳輸
+    prefetch_factor: int = 4  # 每個 worker 預取的批次數
     
     # 進階設定
+    seed: int = 42  # 資料集分割的隨機種子，固定可重現
     patience: int = 50  # 早停耐心值
     save_period: int = 10  # 儲存週期
     resume: bool = False  # 是否恢復訓練
+    export_precision: str = "fp32"  # 訓練後匯出精度：fp32/fp16/int8
+    val_every_n: int = 5  # 每 N 個 epoch 驗證一次 (1 = 每個 epoch)
+    plots_every_n: int = 5  # 每 N 個 epoch 繪圖一次 (1 = 每個 epoch)
     
     def to_dict(self) -> Dict:
         """轉換為字典"""
@@ -81,6 +215,7 @@ class TrainingConfig:
             'model_name': self.model_name,
             'base_model': self.base_model,
             'dataset_name': self.dataset_name,
+            'classes': self.classes,
             'train_ratio': self.train_ratio,
             'val_ratio': self.val_ratio,
             'test_ratio': self.test_ratio,
@@ -91,14 +226,24 @@ class TrainingConfig:
             'optimizer': self.optimizer,
             'weight_decay': self.weight_decay,
             'momentum': self.momentum,
+            'amp': self.amp,
+            'compile': self.compile,
             'augmentation': self.augmentation,
             'mixup': self.mixup,
             'copy_paste': self.copy_paste,
+            'augment_mask': self.augment_mask,
             'device': self.device,
             'workers': self.workers,
+            'persistent_workers': self.persistent_workers,
+            'pin_memory': self.pin_memory,
+            'prefetch_factor': self.prefetch_factor,
+            'seed': self.seed,
             'patience': self.patience,
             'save_period': self.save_period,
-            'resume': self.resume
+            'resume': self.resume,
+            'export_precision': self.export_precision,
+            'val_every_n': self.val_every_n,
+            'plots_every_n': self.plots_every_n
         }
 
     def get_optimal_device(self) -> str:
@@ -119,13 +264,35 @@ class TrainingConfig:
             print(f"⚠️ 設備檢測失敗，使用 CPU：{e}")
             return "cpu"
 
+    def get_optimal_workers(self) -> int:
+        """自動檢測合適的 DataLoader worker 數
+
+        GPU 訓練時依 GPU 數給 worker，避免資料載入餓死 GPU；
+        CPU 訓練時前向傳播才是瓶頸，worker 數多了只會互搶資源。
+        """
+        n_cpu = os.cpu_count() or 4
+        
+        if ULTRALYTICS_AVAILABLE:
+            try:
+                import torch
+                if 'cuda' in self.get_optimal_device():
+                    n_gpu = torch.cuda.device_count()
+                    return min(n_cpu, 4 * max(1, n_gpu))
+            except Exception as e:
+                print(f"⚠️ worker 數檢測失敗，使用保守值：{e}")
+        
+        return min(4, n_cpu)
+
 
 class DatasetPreparer:
     """資料集準備器"""
     
-    def __init__(self, source_dir: str, output_dir: str):
+    def __init__(self, source_dir: str, output_dir: str,
+                 num_threads: Optional[int] = None):
         self.source_dir = Path(source_dir)
         self.output_dir = Path(output_dir)
+        # 複製檔案的執行緒數，I/O 密集工作可超過實體核心數
+        self.num_threads = num_threads or min(32, (os.cpu_count() or 1) * 4)
         
     def prepare_yolo_dataset(self, config: TrainingConfig, 
                            progress_callback: Optional[Callable] = None) -> str:
@@ -138,7 +305,7 @@ class DatasetPreparer:
         self._create_dataset_structure(dataset_path)
         
         # 收集圖片和標註檔案
-        image_files, label_files = self._collect_files()
+        image_files, label_map = self._collect_files()
         
         if not image_files:
             raise ValueError("未找到任何圖片檔案")
@@ -147,53 +314,85 @@ class DatasetPreparer:
         
         # 分割資料集
         train_files, val_files, test_files = self._split_dataset(
-            image_files, config.train_ratio, config.val_ratio, config.test_ratio
+            image_files, config.train_ratio, config.val_ratio, config.test_ratio,
+            seed=config.seed
         )
         
         print(f"資料集分割: 訓練={len(train_files)}, 驗證={len(val_files)}, 測試={len(test_files)}")
         
-        # 複製檔案到對應目錄
-        total_files = len(train_files) + len(val_files) + len(test_files)
-        processed = 0
+        splits = {"train": train_files, "val": val_files, "test": test_files}
         
-        for split_name, file_list in [("train", train_files), ("val", val_files), ("test", test_files)]:
+        # 建立所有 (來源, 目的) 複製工作，再以執行緒池並行複製
+        copy_jobs = []
+        for split_name, file_list in splits.items():
             for img_file in file_list:
-                # 複製圖片
                 img_dst = dataset_path / "images" / split_name / img_file.name
-                shutil.copy2(img_file, img_dst)
+                copy_jobs.append((img_file, img_dst))
                 
-                # 複製標註檔案
-                label_file = self._find_label_file(img_file, label_files)
+                label_file = label_map.get(img_file.stem)
                 if label_file:
                     label_dst = dataset_path / "labels" / split_name / f"{img_file.stem}.txt"
-                    shutil.copy2(label_file, label_dst)
-                
-                processed += 1
-                if progress_callback:
-                    progress_callback(int(processed / total_files * 100))
+                    copy_jobs.append((label_file, label_dst))
+        
+        total_jobs = len(copy_jobs)
+        processed = 0
+        progress_lock = threading.Lock()
+        
+        def copy_one(job):
+            nonlocal processed
+            src, dst = job
+            self._fast_copy(src, dst)
+            if progress_callback:
+                with progress_lock:
+                    processed += 1
+                    progress_callback(int(processed / total_jobs * 100))
+        
+        with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
+            list(executor.map(copy_one, copy_jobs))
         
         # 創建資料集配置檔案
         self._create_dataset_yaml(dataset_path, config)
         
-        # 生成統計報告
-        self._generate_dataset_statistics(dataset_path)
+        # 生成統計報告 (重用複製階段的檔案清單，不再重新掃描目錄)
+        self._generate_dataset_statistics(dataset_path, splits, label_map)
         
         print(f"✅ 資料集準備完成：{dataset_path}")
         return str(dataset_path / "dataset.yaml")
     
+    @staticmethod
+    def _fast_copy(src: Path, dst: Path):
+        """複製單一檔案
+
+        同一檔案系統時以硬連結取代位元組複製 (O(1) 的中繼資料操作)，
+        跨檔案系統或不支援硬連結時退回 shutil.copy2。
+        """
+        try:
+            if dst.exists():
+                dst.unlink()
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+    
     def _create_dataset_structure(self, dataset_path: Path):
         """創建資料集目錄結構"""
-        for split in ["train", "val", "test"]:
-            (dataset_path / "images" / split).mkdir(parents=True, exist_ok=True)
-            (dataset_path / "labels" / split).mkdir(parents=True, exist_ok=True)
+        dirs = [dataset_path / kind / split
+                for kind in ("images", "labels")
+                for split in ("train", "val", "test")]
+        
+        # 網路檔案系統上 mkdir 是延遲瓶頸，並行建立
+        with ThreadPoolExecutor(max_workers=len(dirs)) as executor:
+            list(executor.map(
+                lambda d: d.mkdir(parents=True, exist_ok=True), dirs))
     
-    def _collect_files(self) -> Tuple[List[Path], List[Path]]:
-        """收集圖片和標註檔案"""
-        # 支援的圖片格式
-        image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'}
-        
-        image_files = []
-        label_files = []
+    def _collect_files(self) -> Tuple[List[Path], Dict[str, Path]]:
+        """收集圖片和標註檔案
+
+        每個來源目錄只做一次 os.scandir，以副檔名分流，
+        避免每種格式各掃描一次目錄。標註檔案以 stem 建成字典，
+        供複製階段 O(1) 查找。
+        """
+        image_files = set()
+        label_files = set()
         
         # 從多個可能的來源收集檔案
         search_paths = [
@@ -205,57 +404,51 @@ class DatasetPreparer:
         ]
         
         for search_path in search_paths:
-            if search_path.exists():
-                # 收集圖片檔案
-                for ext in image_extensions:
-                    image_files.extend(search_path.glob(f"*{ext}"))
-                
-                # 收集標註檔案
-                label_files.extend(search_path.glob("*.txt"))
-        
-        # 去除重複
-        image_files = list(set(image_files))
-        label_files = list(set(label_files))
-        
-        return image_files, label_files
-    
-    def _find_label_file(self, image_file: Path, label_files: List[Path]) -> Optional[Path]:
-        """為圖片檔案找到對應的標註檔案"""
-        image_stem = image_file.stem
-        
-        for label_file in label_files:
-            if label_file.stem == image_stem:
-                return label_file
-        
-        return None
+            if not search_path.exists():
+                continue
+            
+            with os.scandir(search_path) as it:
+                for entry in it:
+                    if not entry.is_file():
+                        continue
+                    suffix = os.path.splitext(entry.name)[1].lower()
+                    if suffix in IMAGE_EXTENSIONS:
+                        image_files.add(Path(entry.path))
+                    elif suffix == '.txt':
+                        label_files.add(Path(entry.path))
+        
+        label_map = {lf.stem: lf for lf in label_files}
+        return list(image_files), label_map
     
     def _split_dataset(self, files: List[Path], train_ratio: float, 
-                      val_ratio: float, test_ratio: float) -> Tuple[List[Path], List[Path], List[Path]]:
-        """分割資料集"""
+                      val_ratio: float, test_ratio: float,
+                      seed: int = 42) -> Tuple[List[Path], List[Path], List[Path]]:
+        """分割資料集 (numpy 排列打亂，固定種子可重現)"""
         # 檢查比例
         total_ratio = train_ratio + val_ratio + test_ratio
         if abs(total_ratio - 1.0) > 0.01:
             raise ValueError(f"資料集比例總和應為1.0，當前為{total_ratio}")
         
-        # 隨機打亂
-        files = files.copy()
-        random.shuffle(files)
+        # C 層級的隨機排列取代 Python 的 Fisher-Yates
+        arr = np.asarray(files, dtype=object)
+        rng = np.random.default_rng(seed)
+        arr = arr[rng.permutation(arr.size)]
         
-        total_files = len(files)
+        total_files = arr.size
         train_count = int(total_files * train_ratio)
         val_count = int(total_files * val_ratio)
         
-        train_files = files[:train_count]
-        val_files = files[train_count:train_count + val_count]
-        test_files = files[train_count + val_count:]
+        train_files = arr[:train_count].tolist()
+        val_files = arr[train_count:train_count + val_count].tolist()
+        test_files = arr[train_count + val_count:].tolist()
         
         return train_files, val_files, test_files
     
     def _create_dataset_yaml(self, dataset_path: Path, config: TrainingConfig):
         """創建資料集YAML配置檔案"""
         
-        # 載入車種類別
-        classes = self._load_vehicle_classes()
+        # 載入車種類別 (config 有指定時直接採用，跳過檔案解析)
+        classes = config.classes or self._load_vehicle_classes()
         
         yaml_content = {
             'path': str(dataset_path.absolute()),
@@ -267,67 +460,114 @@ class DatasetPreparer:
         }
         
         yaml_file = dataset_path / "dataset.yaml"
-        with open(yaml_file, 'w', encoding='utf-8') as f:
-            yaml.dump(yaml_content, f, default_flow_style=False, allow_unicode=True)
+        tmp_file = yaml_file.with_name(yaml_file.name + '.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            yaml.dump(yaml_content, f, Dumper=YAML_DUMPER,
+                      default_flow_style=False, allow_unicode=True)
+        os.replace(tmp_file, yaml_file)
         
         print(f"📄 資料集配置檔案：{yaml_file}")
         print(f"🏷️ 車種類別 ({len(classes)}): {', '.join(classes)}")
     
     def _load_vehicle_classes(self) -> List[str]:
-        """載入車種類別"""
+        """載入車種類別 (相同來源目錄的結果會被記憶)"""
+        return list(self._load_vehicle_classes_cached(str(self.source_dir)))
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=4)
+    def _load_vehicle_classes_cached(source_dir: str) -> Tuple[str, ...]:
+        """實際載入車種類別，以來源目錄為鍵快取"""
         # 嘗試從 vehicle_classes.json 載入
         try:
             from vehicle_class_manager import VehicleClassManager
             manager = VehicleClassManager()
             classes = manager.get_all_classes(enabled_only=True)
-            return [cls.name for cls in classes]
-        except:
+            return tuple(cls.name for cls in classes)
+        except ImportError:
             pass
+        except Exception as e:
+            # 類別管理器本身的錯誤不應被靜默吞掉 -
+            # 靜默退回預設4類會改寫 dataset.yaml 的 nc
+            print(f"⚠️ 載入車種類別失敗，改用備用來源：{e}")
         
         # 備用：從 classes.txt 載入
         classes_files = [
             Path("classes.txt"),
             Path("exports/yolo/classes.txt"),
-            self.source_dir / "classes.txt"
+            Path(source_dir) / "classes.txt"
         ]
         
         for classes_file in classes_files:
             if classes_file.exists():
                 with open(classes_file, 'r', encoding='utf-8') as f:
-                    return [line.strip() for line in f if line.strip()]
+                    return tuple(line.strip() for line in f if line.strip())
         
         # 預設類別
-        return ["機車", "汽車", "卡車", "公車"]
+        return ("機車", "汽車", "卡車", "公車")
+    
+    @staticmethod
+    def _parse_label_file(label_file: Path) -> Tuple[int, np.ndarray]:
+        """解析單一標註檔，回傳 (標註數, 類別計數陣列)
+
+        有 Numba 時以 JIT 位元組解析器單趟掃過檔案內容，
+        否則退回 np.loadtxt + np.bincount。
+        """
+        empty = np.zeros(0, dtype=np.int64)
+        
+        if NUMBA_AVAILABLE:
+            try:
+                buf = np.frombuffer(label_file.read_bytes(), dtype=np.uint8)
+            except OSError:
+                return 0, empty
+            count, hist = _parse_labels(buf)
+            return count, hist
+        
+        try:
+            class_ids = np.loadtxt(label_file, usecols=0,
+                                   dtype=np.int32, ndmin=1)
+        except (ValueError, OSError):
+            return 0, empty
+        
+        if class_ids.size == 0:
+            return 0, empty
+        return int(class_ids.size), np.bincount(class_ids).astype(np.int64)
     
-    def _generate_dataset_statistics(self, dataset_path: Path):
-        """生成資料集統計資訊"""
+    def _generate_dataset_statistics(self, dataset_path: Path,
+                                     splits: Dict[str, List[Path]],
+                                     label_map: Dict[str, Path]):
+        """生成資料集統計資訊
+
+        直接使用複製階段已在記憶體中的檔案清單與標註索引，
+        避免對剛寫入的目錄重新 glob。
+        """
         stats = {
             'created_at': datetime.now().isoformat(),
             'dataset_path': str(dataset_path),
             'splits': {}
         }
         
-        for split in ["train", "val", "test"]:
-            images_dir = dataset_path / "images" / split
-            labels_dir = dataset_path / "labels" / split
-            
-            image_count = len(list(images_dir.glob("*")))
-            label_count = len(list(labels_dir.glob("*.txt")))
+        for split, image_files in splits.items():
+            image_count = len(image_files)
+            split_labels = [label_map[f.stem] for f in image_files
+                            if f.stem in label_map]
+            label_count = len(split_labels)
             
-            # 統計標註數量
+            # 統計標註數量 - numpy/Numba 批次解析，取代逐行 Python 迴圈
+            # 直方圖用固定大小陣列，合併時不需再判斷大小重新配置
             total_annotations = 0
-            class_counts = {}
+            histogram = np.zeros(MAX_CLASSES, dtype=np.int64)
+            
+            for label_file in split_labels:
+                count, counts = self._parse_label_file(label_file)
+                if count == 0:
+                    continue
+                
+                total_annotations += count
+                counts = counts[:MAX_CLASSES]
+                histogram[:counts.size] += counts
             
-            for label_file in labels_dir.glob("*.txt"):
-                with open(label_file, 'r') as f:
-                    lines = f.readlines()
-                    total_annotations += len(lines)
-                    
-                    for line in lines:
-                        parts = line.strip().split()
-                        if parts:
-                            class_id = int(parts[0])
-                            class_counts[class_id] = class_counts.get(class_id, 0) + 1
+            nonzero = np.nonzero(histogram)[0]
+            class_counts = {int(i): int(histogram[i]) for i in nonzero}
             
             stats['splits'][split] = {
                 'images': image_count,
@@ -336,10 +576,9 @@ class DatasetPreparer:
                 'class_distribution': class_counts
             }
         
-        # 儲存統計資訊
+        # 儲存統計資訊 (原子性寫入，避免留下半寫檔案)
         stats_file = dataset_path / "dataset_statistics.json"
-        with open(stats_file, 'w', encoding='utf-8') as f:
-            json.dump(stats, f, indent=2, ensure_ascii=False)
+        _write_json_atomic(stats_file, stats)
         
         print(f"📊 資料集統計：{stats_file}")
 
@@ -375,19 +614,45 @@ class ModelTrainer:
         model_path = self._download_base_model(config.base_model)
         self.model = YOLO(model_path)
         
+        # 圖編譯：把 eager 核心融合為 inductor 圖；編譯失敗時退回 eager，
+        # 不讓訓練因 dynamo 的邊角問題中止
+        if config.compile:
+            try:
+                self.model.model = torch.compile(
+                    self.model.model, backend="inductor",
+                    mode="reduce-overhead", dynamic=True)
+                print("⚡ torch.compile 已啟用 (inductor)")
+            except Exception as e:
+                print(f"⚠️ torch.compile 啟用失敗，改用 eager 模式：{e}")
+        
         # 設定訓練參數
         train_args = self._prepare_training_args(dataset_yaml, config)
         
+        # 預先解碼訓練影像為磁碟快取
+        self._precache_images(dataset_yaml)
+        
         # 設定回調函數
         if progress_callback or log_callback:
             self._setup_callbacks(progress_callback, log_callback)
         
+        # 降頻中途驗證與繪圖，縮短牆鐘時間
+        self._setup_periodic_eval(config)
+        
         try:
             # 開始訓練
             print(f"📚 載入資料集：{dataset_yaml}")
             print(f"🎯 訓練參數：{config.epochs} epochs, batch_size={config.batch_size}")
             
-            results = self.model.train(**train_args)
+            # 放寬 FP32 matmul 精度，Ampere+ GPU 可用 TF32/BF16 張量核心
+            if config.amp and torch.cuda.is_available():
+                if torch.cuda.is_bf16_supported():
+                    print("🎛️ 偵測到 BF16 支援，混合精度將使用 BF16")
+                torch.set_float32_matmul_precision('high')
+            
+            with _dataloader_defaults(config.persistent_workers,
+                                       config.pin_memory,
+                                       config.prefetch_factor):
+                results = self.model.train(**train_args)
             
             # 儲存最終模型
             final_model_path = self._save_final_model(config.model_name)
@@ -402,6 +667,32 @@ class ModelTrainer:
             print(f"❌ 訓練失敗：{str(e)}")
             raise
     
+    def export_model(self, model_path: str, precision: str = "fp32",
+                     dataset_yaml: Optional[str] = None) -> Optional[str]:
+        """將訓練後模型匯出為 ONNX，可選 FP16 半精度或 INT8 後訓練量化
+
+        FP16 將權重記憶體減半、INT8 減為四分之一，
+        在支援 VNNI 的 CPU 與邊緣裝置上可大幅提升推論吞吐。
+        """
+        if precision == "fp32":
+            return None
+        
+        if not ULTRALYTICS_AVAILABLE:
+            raise RuntimeError("ultralytics 未安裝，無法匯出模型")
+        
+        try:
+            print(f"📦 匯出模型（{precision}）...")
+            model = YOLO(model_path)
+            exported = model.export(format="onnx",
+                                    half=(precision == "fp16"),
+                                    int8=(precision == "int8"),
+                                    data=dataset_yaml)
+            print(f"✅ 模型已匯出：{exported}")
+            return str(exported)
+        except Exception as e:
+            print(f"⚠️ 模型匯出失敗：{e}")
+            return None
+    
     def evaluate_model(self, model_path: str, dataset_yaml: str) -> Dict:
         """評估模型效能"""
         
@@ -453,8 +744,7 @@ class ModelTrainer:
     def _save_training_config(self, config: TrainingConfig):
         """儲存訓練配置"""
         config_file = self.current_run_dir / "training_config.json"
-        with open(config_file, 'w', encoding='utf-8') as f:
-            json.dump(config.to_dict(), f, indent=2, ensure_ascii=False)
+        _write_json_atomic(config_file, config.to_dict())
     
     def _download_base_model(self, base_model: str) -> str:
         """下載基礎模型"""
@@ -482,6 +772,36 @@ class ModelTrainer:
             
             raise RuntimeError("無法下載任何基礎模型")
     
+    def _precache_images(self, dataset_yaml: str):
+        """以執行緒池預先解碼訓練影像為 .npy 磁碟快取
+
+        Ultralytics 的 cache='disk' 會把解碼後的影像存成同名 .npy；
+        先並行補齊快取後，訓練 worker 之間共用同一份解碼結果，
+        避免 RAM 快取在每個 worker 各留一份副本。
+        """
+        images_dir = Path(dataset_yaml).parent / "images" / "train"
+        if not images_dir.exists():
+            return
+        
+        image_files = [p for p in images_dir.iterdir()
+                       if p.suffix.lower() in IMAGE_EXTENSIONS]
+        if not image_files:
+            return
+        
+        def cache_one(img_file: Path):
+            npy_file = img_file.with_suffix('.npy')
+            if npy_file.exists():
+                return
+            img = _decode_image(img_file)
+            if img is not None:
+                np.save(str(npy_file), img)
+        
+        num_threads = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            list(executor.map(cache_one, image_files))
+        
+        print(f"💾 磁碟快取完成：{len(image_files)} 張訓練影像")
+    
     def _prepare_training_args(self, dataset_yaml: str, config: TrainingConfig) -> Dict:
         """準備訓練參數"""
         # 自動檢測最佳設備
@@ -496,8 +816,10 @@ class ModelTrainer:
             'optimizer': config.optimizer,
             'weight_decay': config.weight_decay,
             'momentum': config.momentum,
+            'amp': config.amp,
             'device': optimal_device,  # 使用自動檢測的設備
-            'workers': config.workers,
+            # workers <= 0 視為「自動」，依硬體偵測
+            'workers': config.workers if config.workers > 0 else config.get_optimal_workers(),
             'patience': config.patience,
             'save_period': config.save_period,
             'project': str(self.output_dir),
@@ -505,7 +827,8 @@ class ModelTrainer:
             'exist_ok': True,
             'save': True,
             'plots': True,
-            'val': True
+            'val': True,
+            'cache': 'disk'  # 磁碟快取可讓所有 worker 共用同一份解碼結果
         }
         
         # 數據增強設定
@@ -554,6 +877,25 @@ class ModelTrainer:
         if hasattr(self.model, 'add_callback'):
             self.model.add_callback('on_train_epoch_end', on_train_epoch_end)
     
+    def _setup_periodic_eval(self, config: TrainingConfig):
+        """將中途驗證與繪圖降頻到每 N 個 epoch
+
+        每個 epoch 的完整驗證與 matplotlib 繪圖會佔掉可觀的牆鐘時間；
+        中途只每 N 個 epoch 執行一次，最後一個 epoch 仍完整執行。
+        """
+        val_n = max(1, config.val_every_n)
+        plots_n = max(1, config.plots_every_n)
+        if val_n == 1 and plots_n == 1:
+            return
+        
+        def on_train_epoch_end(trainer):
+            is_last = trainer.epoch == trainer.epochs - 1
+            trainer.args.val = is_last or (trainer.epoch % val_n == 0)
+            trainer.args.plots = is_last or (trainer.epoch % plots_n == 0)
+        
+        if hasattr(self.model, 'add_callback'):
+            self.model.add_callback('on_train_epoch_end', on_train_epoch_end)
+    
     def _save_final_model(self, model_name: str) -> str:
         """儲存最終模型"""
         # 找到最佳權重
@@ -592,8 +934,7 @@ class ModelTrainer:
         
         # 儲存報告
         report_file = self.current_run_dir / "training_report.json"
-        with open(report_file, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        _write_json_atomic(report_file, report)
         
         print(f"📋 訓練報告：{report_file}")
 
@@ -706,6 +1047,7 @@ if __name__ == "__main__":
         epochs=50,
         batch_size=8,
         image_size=640
+        # classes=["機車", "汽車", "卡車", "公車"]  # 可直接指定，跳過 classes.txt
     )
     
     print("🚗 自訂車輛檢測模型訓練")
@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+"""
+功能測試腳本 - 驗證各模組匯入與核心功能是否正常
+執行方式: python test_features.py
+測試結果會寫入 test_report.json 供 CI 檢查
+"""
+
+import os
+import sys
+import time
+import io
+import types
+import threading
+import importlib
+import importlib.util
+import functools
+from importlib.metadata import distribution, PackageNotFoundError
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+
+class _StdoutRouter:
+    """執行緒區域的 stdout 分流器：測試執行緒設定了緩衝區時寫入緩衝，
+    否則直接寫到真正的 stdout。讓各測試平行執行時輸出不會交錯"""
+
+    def __init__(self, real):
+        self._real = real
+        self._local = threading.local()
+
+    def set_buffer(self, buf):
+        self._local.buffer = buf
+
+    def write(self, text):
+        target = getattr(self._local, 'buffer', None) or self._real
+        return target.write(text)
+
+    def flush(self):
+        target = getattr(self._local, 'buffer', None) or self._real
+        target.flush()
+
+
+_stdout_router = _StdoutRouter(sys.stdout)
+sys.stdout = _stdout_router
+
+
+@contextmanager
+def captured():
+    """攔截目前執行緒的輸出到 StringIO，離開時一次寫回 stdout。
+    ~40 次 print 的逐行 write 系統呼叫合併為每個測試一次"""
+    buf = io.StringIO()
+    _stdout_router.set_buffer(buf)
+    try:
+        yield buf
+    finally:
+        _stdout_router.set_buffer(None)
+
+
+class _LazyModule(types.ModuleType):
+    """延遲載入代理：第一次存取屬性時才真正匯入模組。
+    torch/psutil 這類大型原生套件的冷啟動可達數百毫秒到數秒，
+    沒執行到的測試分支完全不必付出這筆成本"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_name'] = name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__dict__['_lazy_name'])
+        sys.modules[self.__dict__['_lazy_name']] = module
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name):
+    """回傳延遲載入代理；若模組已載入則直接沿用 sys.modules 中的實體"""
+    return sys.modules.get(name) or _LazyModule(name)
+
+
+psutil = lazy_import("psutil")
+
+# orjson 為 C 實作的 JSON 序列化器，可跳過純 Python 編碼器；
+# AdvancedExporter.export_json / export_coco 等熱路徑同樣適用此模式
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# numba 非必要依賴；有安裝時以 cache=True 持久化 JIT 產物，
+# 第二次執行測試即零編譯成本
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# 核心模組清單 (模組名, 中文說明)，輸出順序依此表固定
+MODULES = [
+    ("main", "主程式"),
+    ("annotator", "標註核心"),
+    ("advanced_exporter", "進階匯出"),
+    ("file_manager", "檔案管理"),
+    ("performance_optimizer", "效能優化"),
+    ("vehicle_class_manager", "車種類別管理"),
+]
+
+# AI 相關模組依賴 torch/ultralytics，屬選用功能，單獨批次測試
+AI_MODULES = [
+    ("ai_assistant", "AI 輔助標註"),
+    ("custom_model_trainer", "自訂模型訓練"),
+]
+
+# 各測試要求的類別功能 (屬性名, 中文說明)，集中定義避免散落重複字串
+EXPORTER_FEATURES = (
+    ('export_coco', 'COCO 格式匯出'),
+    ('export_pascal_voc', 'Pascal VOC 格式匯出'),
+    ('export_json', 'JSON 格式匯出'),
+    ('export_classes_file', '類別檔案匯出'),
+    ('batch_export', '批次匯出'),
+)
+
+FILE_MANAGER_FEATURES = (
+    ('add_recent_file', '最近檔案記錄'),
+    ('create_project', '專案建立'),
+    ('create_backup', '自動備份'),
+    ('export_project_summary', '專案摘要匯出'),
+)
+
+OPTIMIZER_FEATURES = (
+    ('load_image_async', '非同步圖片載入'),
+    ('preload_images', '圖片預載入'),
+)
+
+# 工作目錄在整個測試期間不變，快取起來省掉每次呼叫的 getcwd 系統呼叫
+_CWD = Path.cwd()
+
+
+# 各模組冷匯入耗時（秒），寫入報告供追蹤哪個模組主導啟動成本
+_import_timings = {}
+
+
+@functools.lru_cache(maxsize=None)
+def _probe(name):
+    """匯入單一模組並快取結果，成功回傳 None，失敗回傳例外。
+    同一模組在多個測試間重複檢查時只走一次匯入機制。
+    捕捉所有 Exception：模組匯入成功但頂層初始化失敗（例如
+    ai_assistant 缺 CUDA）不該讓整個測試套件中止"""
+    t0 = time.perf_counter()
+    try:
+        importlib.import_module(name)
+        err = None
+    except Exception as e:
+        err = e
+    _import_timings[name] = time.perf_counter() - t0
+    return err
+
+
+@functools.lru_cache(maxsize=None)
+def _dist_available(name):
+    """以套件中繼資料 (dist-info) 判斷套件是否已安裝；
+    只掃一次目錄，完全不執行目標套件的任何模組層級程式碼"""
+    try:
+        distribution(name)
+        return True
+    except PackageNotFoundError:
+        return False
+
+
+@functools.lru_cache(maxsize=None)
+def _class_attrs(cls):
+    """一次 dir() 建好類別屬性集合，後續檢查都是 O(1) 雜湊查詢，
+    不必每個屬性各走一次 hasattr 的 MRO 走訪"""
+    return frozenset(dir(cls))
+
+
+def _has_attr(cls, attr):
+    """以快取的屬性集合檢查類別是否提供指定屬性"""
+    return attr in _class_attrs(cls)
+
+
+def _read_meminfo():
+    """直接解析 /proc/meminfo，避免為了兩個數值載入整個 psutil；
+    回傳以位元組為單位的 {MemTotal, MemAvailable, ...}"""
+    info = {}
+    with open('/proc/meminfo') as f:
+        for line in f:
+            key, value = line.split(':', 1)
+            info[key] = int(value.split()[0]) * 1024
+    return info
+
+
+def _read_vmrss():
+    """從 /proc/self/status 讀取本行程的常駐記憶體 (位元組)"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def _ttl_cache(ttl):
+    """以 time.monotonic 為期限的小型快取裝飾器；
+    在 TTL 視窗內重複呼叫直接回傳上次結果，不再讀檔"""
+    def decorator(func):
+        state = {'expires': 0.0, 'value': None}
+
+        @functools.wraps(func)
+        def wrapper():
+            now = time.monotonic()
+            if now >= state['expires']:
+                state['value'] = func()
+                state['expires'] = now + ttl
+            return state['value']
+        return wrapper
+    return decorator
+
+
+@_ttl_cache(0.1)
+def _get_mem():
+    """取得 (總記憶體, 可用記憶體, 行程 RSS)；Linux 走 /proc 快路徑，
+    其他平台才退回 psutil。測試只需「非零」判斷，100 毫秒內的
+    重複呼叫共用同一次讀取"""
+    if sys.platform.startswith('linux'):
+        info = _read_meminfo()
+        return info.get('MemTotal', 0), info.get('MemAvailable', 0), _read_vmrss()
+    memory = psutil.virtual_memory()
+    rss = psutil.Process().memory_info().rss
+    return memory.total, memory.available, rss
+
+
+def _iou_batch(a, b):
+    """NumPy 向量化的成對 IoU 參考實作，a/b 為 (N,4) 的 [x, y, w, h] 陣列。
+    整批計算走 C 迴圈，用來驗證逐框 Python 呼叫的數值正確性"""
+    a = a.astype(np.float64)
+    b = b.astype(np.float64)
+    ax2, ay2 = a[:, 0] + a[:, 2], a[:, 1] + a[:, 3]
+    bx2, by2 = b[:, 0] + b[:, 2], b[:, 1] + b[:, 3]
+
+    inter_w = np.clip(np.minimum(ax2, bx2) - np.maximum(a[:, 0], b[:, 0]), 0, None)
+    inter_h = np.clip(np.minimum(ay2, by2) - np.maximum(a[:, 1], b[:, 1]), 0, None)
+    inter = inter_w * inter_h
+
+    union = a[:, 2] * a[:, 3] + b[:, 2] * b[:, 3] - inter
+    return inter / (union + 1e-9)
+
+
+if NUMBA_AVAILABLE:
+    @numba.njit(cache=True, fastmath=True)
+    def _iou_ref(a, b):
+        """numba 編譯的逐列 IoU 基準；fastmath 允許 LLVM 將
+        min/max/mul 鏈重排成 SIMD"""
+        n = a.shape[0]
+        out = np.empty(n, dtype=np.float64)
+        for i in range(n):
+            ax1, ay1, aw, ah = a[i, 0], a[i, 1], a[i, 2], a[i, 3]
+            bx1, by1, bw, bh = b[i, 0], b[i, 1], b[i, 2], b[i, 3]
+            inter_w = min(ax1 + aw, bx1 + bw) - max(ax1, bx1)
+            inter_h = min(ay1 + ah, by1 + bh) - max(ay1, by1)
+            inter = max(0.0, inter_w) * max(0.0, inter_h)
+            union = aw * ah + bw * bh - inter
+            out[i] = inter / (union + 1e-9)
+        return out
+
+
+# 測試項目名稱，同時決定報告與輸出的固定順序
+TEST_NAMES = (
+    'modules_import',
+    'yolo_export',
+    'advanced_export',
+    'file_manager',
+    'performance_optimizer',
+    'ai_functionality',
+)
+
+
+@dataclass
+class TestReport:
+    """測試報告結構；__slots__ 省去每個實例的 __dict__ 配置，
+    屬性存取為 C 層 slot 讀取（CI 仍支援 3.8，不用 slots=True 參數）"""
+
+    __slots__ = TEST_NAMES + ('test_time', 'overall_status')
+
+    test_time: str
+    modules_import: bool
+    yolo_export: bool
+    advanced_export: bool
+    file_manager: bool
+    performance_optimizer: bool
+    ai_functionality: bool
+    overall_status: bool
+
+    def to_dict(self):
+        """轉為與舊版 JSON 相同的巢狀結構，下游 CI 解析不受影響；
+        另附各模組匯入耗時，供 CI 對啟動時間回歸設門檻"""
+        return {
+            'test_time': self.test_time,
+            'test_results': {name: getattr(self, name) for name in TEST_NAMES},
+            'timings': {name: round(dt, 4) for name, dt in sorted(_import_timings.items())},
+            'overall_status': self.overall_status,
+        }
+
+
+def _import_batch(modules):
+    """平行匯入一批模組；匯入機制的檔案 I/O 會釋放 GIL，
+    獨立模組的冷啟動載入可以重疊，縮短總耗時"""
+    names = [name for name, _ in modules]
+
+    # 先以 find_spec 依序暖機 finder 的路徑快取，後續匯入命中熱字典，
+    # 不必為每個模組重新 stat 目錄；spec 不存在者直接短路，
+    # 回傳錯誤物件而非走較昂貴的例外路徑
+    specs = {name: importlib.util.find_spec(name) for name in names}
+
+    def probe(name):
+        if specs[name] is None:
+            return ModuleNotFoundError(f"No module named '{name}'")
+        return _probe(name)
+
+    with ThreadPoolExecutor(max_workers=min(8, len(names))) as pool:
+        return list(pool.map(probe, names))
+
+
+def test_modules_import():
+    """測試各模組是否可正常匯入"""
+    print("🧪 測試模組匯入...")
+
+    # 一次同步 finder 快取，之後的 find_spec / import 都走熱路徑
+    importlib.invalidate_caches()
+
+    success = True
+    for (name, desc), err in zip(MODULES, _import_batch(MODULES)):
+        if err is None:
+            print(f"✓ {desc}模組 ({name}) 匯入成功")
+        else:
+            print(f"✗ {desc}模組 ({name}) 匯入失敗: {err}")
+            success = False
+
+    for (name, desc), err in zip(AI_MODULES, _import_batch(AI_MODULES)):
+        if err is None:
+            print(f"✓ {desc}模組 ({name}) 匯入成功")
+        else:
+            print(f"⚠️  {desc}模組 ({name}) 不可用: {err}")
+
+    return success
+
+
+def test_yolo_export():
+    """測試 YOLO 格式匯出功能"""
+    print("\n🧪 測試 YOLO 匯出...")
+
+    try:
+        from advanced_exporter import AdvancedExporter
+
+        if _has_attr(AdvancedExporter, 'export_yolo'):
+            print("✓ YOLO 匯出功能可用")
+            return True
+        else:
+            print("✗ 缺少 export_yolo 方法")
+            return False
+    except Exception as e:
+        print(f"✗ YOLO 匯出測試失敗: {e}")
+        return False
+
+
+def test_advanced_export():
+    """測試進階匯出器的各種格式支援"""
+    print("\n🧪 測試進階匯出...")
+
+    try:
+        from advanced_exporter import AdvancedExporter
+
+        present = _class_attrs(AdvancedExporter)
+        success = True
+        for attr, desc in EXPORTER_FEATURES:
+            if attr in present:
+                print(f"✓ {desc}可用")
+            else:
+                print(f"✗ 缺少 {attr} 方法（{desc}）")
+                success = False
+
+        return success
+    except Exception as e:
+        print(f"✗ 進階匯出測試失敗: {e}")
+        return False
+
+
+def test_file_manager():
+    """測試檔案管理功能"""
+    print("\n🧪 測試檔案管理...")
+
+    try:
+        from file_manager import FileManager
+
+        present = _class_attrs(FileManager)
+        success = True
+        for attr, desc in FILE_MANAGER_FEATURES:
+            if attr in present:
+                print(f"✓ {desc}可用")
+            else:
+                print(f"✗ 缺少 {attr} 方法（{desc}）")
+                success = False
+
+        return success
+    except Exception as e:
+        print(f"✗ 檔案管理測試失敗: {e}")
+        return False
+
+
+def test_performance_optimizer():
+    """測試效能優化模組"""
+    print("\n🧪 測試效能優化...")
+
+    try:
+        total, available, rss = _get_mem()
+        if total > 0:
+            print(f"✓ 記憶體監控可用 (總記憶體 {total / (1024 ** 3):.1f} GB, "
+                  f"可用 {available / (1024 ** 3):.1f} GB, 本行程 {rss / (1024 ** 2):.0f} MB)")
+        else:
+            print("✗ 記憶體資訊讀取異常")
+            return False
+
+        from performance_optimizer import PerformanceOptimizer
+
+        optimizer = PerformanceOptimizer(str(_CWD))
+        try:
+            present = _class_attrs(PerformanceOptimizer)
+            success = True
+            for attr, desc in OPTIMIZER_FEATURES:
+                if attr in present:
+                    print(f"✓ {desc}可用")
+                else:
+                    print(f"✗ 缺少 {attr} 方法（{desc}）")
+                    success = False
+        finally:
+            optimizer.cleanup()
+
+        return success
+    except Exception as e:
+        print(f"✗ 效能優化測試失敗: {e}")
+        return False
+
+
+def test_ai_functionality():
+    """測試 AI 輔助功能（torch/ultralytics 缺少時視為跳過）"""
+    print("\n🧪 測試 AI 功能...")
+
+    # 中繼資料查詢成本是微秒級，遠低於實際匯入 ai_assistant 時
+    # 連帶觸發的 torch/ultralytics 初始化
+    if not (_dist_available("torch") and _dist_available("ultralytics")):
+        print("⚠️  AI 功能不可用（未安裝 torch/ultralytics，略過匯入檢查）")
+        return True
+
+    try:
+        # 若模組已由匯入測試載入過，直接重用，避免重複走匯入機制
+        ai_assistant = sys.modules.get('ai_assistant') or importlib.import_module('ai_assistant')
+
+        optimizer = ai_assistant.SmartAnnotationOptimizer()
+        iou = optimizer.calculate_iou([0, 0, 100, 100], [50, 50, 100, 100])
+        if 0.0 <= iou <= 1.0:
+            print(f"✓ IoU 計算正確 (IoU = {iou:.4f})")
+        else:
+            print(f"✗ IoU 計算結果異常: {iou}")
+            return False
+
+        # 批次探測：1000 組隨機框走向量化參考實作，
+        # 前 10 組與逐框計算比對確認數值一致
+        rng = np.random.default_rng(42)
+        boxes_a = rng.integers(0, 500, (1000, 4))
+        boxes_b = rng.integers(0, 500, (1000, 4))
+        batch_iou = _iou_batch(boxes_a, boxes_b)
+
+        for i in range(10):
+            scalar = optimizer.calculate_iou(boxes_a[i].tolist(), boxes_b[i].tolist())
+            if abs(scalar - batch_iou[i]) > 1e-6:
+                print(f"✗ IoU 批次計算與逐框結果不一致 (第 {i} 組: "
+                      f"{scalar:.6f} vs {batch_iou[i]:.6f})")
+                return False
+        print(f"✓ IoU 批次計算一致 (1000 組隨機框, 平均 IoU = {batch_iou.mean():.4f})")
+
+        if NUMBA_AVAILABLE:
+            # 以 2 列小輸入先觸發編譯（或命中磁碟快取），再跑完整比對
+            fa = boxes_a.astype(np.float64)
+            fb = boxes_b.astype(np.float64)
+            _iou_ref(fa[:2], fb[:2])
+            ref_iou = _iou_ref(fa, fb)
+            if np.allclose(ref_iou, batch_iou, atol=1e-6):
+                print("✓ numba JIT 基準與 NumPy 結果一致")
+            else:
+                print("✗ numba JIT 基準與 NumPy 結果不一致")
+                return False
+
+        print("✓ AI 輔助功能可用")
+        return True
+    except ImportError as e:
+        print(f"⚠️  AI 功能不可用（缺少依賴）: {e}")
+        return True
+    except Exception as e:
+        print(f"✗ AI 功能測試失敗: {e}")
+        return False
+
+
+def create_test_report():
+    """執行所有測試並產生 test_report.json 報告"""
+    # json/datetime 只有這裡用到；延後匯入讓本檔被當模組載入
+    # （例如 pytest 收集）時不必先付 _strptime/locale 的連帶成本
+    import json
+    from datetime import datetime
+
+    print("=" * 50)
+    print("🚗 YOLO 車輛標註工具 - 功能測試")
+    print("=" * 50)
+
+    report = TestReport(datetime.now().isoformat(),
+                        False, False, False, False, False, False, False)
+
+    tests = [
+        ('modules_import', test_modules_import),
+        ('yolo_export', test_yolo_export),
+        ('advanced_export', test_advanced_export),
+        ('file_manager', test_file_manager),
+        ('performance_optimizer', test_performance_optimizer),
+        ('ai_functionality', test_ai_functionality),
+    ]
+
+    def run_buffered(func):
+        """在工作執行緒中執行測試並攔截其輸出；各測試互不共用可變狀態，
+        時間多花在匯入機制與屬性檢查上，平行化後總耗時趨近最慢的單一測試"""
+        with captured() as buf:
+            result = func()
+        return result, buf.getvalue()
+
+    with ThreadPoolExecutor(max_workers=len(tests)) as pool:
+        futures = {name: pool.submit(run_buffered, func) for name, func in tests}
+
+    # 依固定順序收集各測試的緩衝內容，最後以單次 writelines 輸出，
+    # 將每測試一次的 write 進一步合併為整批一次
+    outputs = []
+    for name, _ in tests:
+        passed, output = futures[name].result()
+        setattr(report, name, passed)
+        outputs.append(output)
+    sys.stdout.writelines(outputs)
+
+    report.overall_status = all(getattr(report, name) for name in TEST_NAMES)
+
+    # 先寫入暫存檔再 os.replace 原子改名，平行 CI 分片或中途中斷
+    # 都不會讓下游讀到殘缺的 JSON
+    report_dict = report.to_dict()
+    tmp_path = f"test_report.json.{os.getpid()}.tmp"
+    if ORJSON_AVAILABLE:
+        payload = orjson.dumps(report_dict, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(report_dict, indent=2, ensure_ascii=False).encode('utf-8')
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, 'test_report.json')
+
+    passed = sum(1 for name in TEST_NAMES if getattr(report, name))
+    total = len(TEST_NAMES)
+    summary = [
+        "\n" + "=" * 50 + "\n",
+        f"📋 測試結果: {passed}/{total} 項通過\n",
+        "✅ 所有測試通過\n" if report.overall_status
+        else "❌ 部分測試未通過，詳見 test_report.json\n",
+        "=" * 50 + "\n",
+    ]
+    sys.stdout.writelines(summary)
+
+    return report.overall_status
+
+
+if __name__ == '__main__':
+    success = create_test_report()
+    sys.exit(0 if success else 1)
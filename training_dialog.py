@@ -6,6 +6,8 @@
 import os
 import sys
 import json
+import time
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict
@@ -15,16 +17,38 @@ from PyQt5.QtWidgets import (
     QLineEdit, QSpinBox, QDoubleSpinBox, QComboBox, QCheckBox,
     QProgressBar, QTextEdit, QTabWidget, QWidget, QFormLayout,
     QGroupBox, QFileDialog, QMessageBox, QSplitter, QTableWidget,
-    QTableWidgetItem, QHeaderView, QSlider, QFrame
+    QTableWidgetItem, QHeaderView, QSlider, QFrame, QPlainTextEdit
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
+from PyQt5.QtCore import (Qt, QThread, pyqtSignal, QTimer, QObject,
+                          QRunnable, QThreadPool, QSignalBlocker)
 from PyQt5.QtGui import QFont, QPixmap, QPainter, QColor
 
+# ijson 可增量解析統計 JSON，峰值記憶體 O(1)；未安裝時退回 json.load
 try:
-    from custom_model_trainer import TrainingConfig, DatasetPreparer, ModelTrainer, TrainingVisualizer
-    TRAINER_AVAILABLE = True
+    import ijson
+    IJSON_AVAILABLE = True
 except ImportError:
-    TRAINER_AVAILABLE = False
+    IJSON_AVAILABLE = False
+
+# custom_model_trainer 連帶拖入 torch/ultralytics（冷匯入可達數秒），
+# 延後到實際開啟訓練對話框時才載入；None 表示尚未嘗試
+TrainingConfig = DatasetPreparer = ModelTrainer = TrainingVisualizer = None
+TRAINER_AVAILABLE = None
+
+
+def _ensure_trainer_imported() -> bool:
+    """第一次需要時才匯入訓練模組，成功與否快取在模組層級"""
+    global TrainingConfig, DatasetPreparer, ModelTrainer, TrainingVisualizer
+    global TRAINER_AVAILABLE
+    
+    if TRAINER_AVAILABLE is None:
+        try:
+            from custom_model_trainer import (TrainingConfig, DatasetPreparer,
+                                              ModelTrainer, TrainingVisualizer)
+            TRAINER_AVAILABLE = True
+        except ImportError:
+            TRAINER_AVAILABLE = False
+    return TRAINER_AVAILABLE
 
 
 class TrainingThread(QThread):
@@ -34,20 +58,48 @@ class TrainingThread(QThread):
     training_completed = pyqtSignal(str)  # 模型路徑
     training_failed = pyqtSignal(str)     # 錯誤訊息
     
-    def __init__(self, dataset_yaml: str, config: TrainingConfig):
+    def __init__(self, dataset_yaml: str, config: "TrainingConfig"):
         super().__init__()
         self.dataset_yaml = dataset_yaml
         self.config = config
         self.trainer = ModelTrainer()
+        self._cancel = threading.Event()
+        self._log_buf = []
+        self._log_lock = threading.Lock()
+        self._last_emit = 0.0  # 進度 emit 降頻用的單調時鐘戳
+        
+    def drain(self) -> str:
+        """取出並清空累積的日誌批次；由主執行緒的計時器定期呼叫"""
+        with self._log_lock:
+            if not self._log_buf:
+                return ""
+            batch, self._log_buf = self._log_buf, []
+        return "\n".join(batch)
+        
+    def request_stop(self):
+        """要求合作式停止；在下一次進度回調時讓 PyTorch 正常解除堆疊，
+        避免 terminate() 強殺執行緒造成 CUDA context 與檔案控制代碼洩漏"""
+        self._cancel.set()
         
     def run(self):
         """執行訓練"""
         try:
             def progress_callback(progress):
+                if self._cancel.is_set():
+                    raise RuntimeError("cancelled")
+                # 快速 GPU 迴圈每 epoch 可觸發數千次回調，
+                # 降到約 10 Hz 即可維持流暢的進度顯示
+                now = time.monotonic()
+                if now - self._last_emit < 0.1 and progress < 100:
+                    return
+                self._last_emit = now
                 self.progress_updated.emit(progress)
             
             def log_callback(message):
-                self.log_updated.emit(message)
+                # 逐行 emit 會讓主執行緒每行做一次 append + 重繪，
+                # 改成工作端緩衝、由計時器整批刷新
+                with self._log_lock:
+                    self._log_buf.append(message)
             
             # 開始訓練
             model_path = self.trainer.train_model(
@@ -57,23 +109,134 @@ class TrainingThread(QThread):
                 log_callback=log_callback
             )
             
+            # 依設定做訓練後匯出（FP16/INT8），失敗不影響訓練結果
+            if self.config.export_precision != "fp32":
+                self.trainer.export_model(model_path,
+                                          self.config.export_precision,
+                                          self.dataset_yaml)
+            
             self.training_completed.emit(model_path)
             
         except Exception as e:
-            self.training_failed.emit(str(e))
+            if self._cancel.is_set():
+                self.log_updated.emit("⏹️ 訓練已取消")
+            else:
+                self.training_failed.emit(str(e))
+
+
+class _PrepareSignals(QObject):
+    """QRunnable 不能直接帶訊號，透過輔助 QObject 轉發"""
+    finished = pyqtSignal(str)  # dataset yaml 路徑
+    failed = pyqtSignal(str)    # 錯誤訊息
+
+
+class PrepareRunnable(QRunnable):
+    """在共用執行緒池中準備資料集，避免凍結 GUI 事件迴圈"""
+    
+    def __init__(self, preparer, config):
+        super().__init__()
+        self.preparer = preparer
+        self.config = config
+        self.signals = _PrepareSignals()
+        
+    def run(self):
+        try:
+            yaml_path = self.preparer.prepare_yolo_dataset(self.config)
+            self.signals.finished.emit(yaml_path)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
 
 
 class ModelTrainingDialog(QDialog):
     """模型訓練對話框"""
     
+    # QSS 提升到類別層級共用：字串物件身分不變時 Qt 會命中
+    # 已解析的樣式快取，開啟對話框不必重新解析選擇器
+    _STYLE_SHEET = """
+            QDialog {
+                background-color: #f8f9fa;
+                color: #2c3e50;
+            }
+            
+            QGroupBox {
+                font-weight: bold;
+                border: 2px solid #bdc3c7;
+                border-radius: 8px;
+                margin: 8px 0px;
+                padding-top: 12px;
+                background-color: white;
+            }
+            
+            QGroupBox::title {
+                subcontrol-origin: margin;
+                left: 16px;
+                padding: 4px 8px;
+                background-color: white;
+                border-radius: 4px;
+            }
+            
+            QPushButton {
+                background-color: #3498db;
+                color: white;
+                border: none;
+                padding: 8px 16px;
+                border-radius: 6px;
+                font-weight: bold;
+                min-width: 120px;
+            }
+            
+            QPushButton:hover {
+                background-color: #2980b9;
+            }
+            
+            QPushButton:pressed {
+                background-color: #21618c;
+            }
+            
+            QPushButton:disabled {
+                background-color: #bdc3c7;
+                color: #7f8c8d;
+            }
+        """
+    
+    _TITLE_STYLE = """
+            QLabel {
+                font-size: 20px;
+                font-weight: bold;
+                color: #2c3e50;
+                padding: 10px;
+                margin-bottom: 10px;
+            }
+        """
+    
+    _LOG_STYLE = """
+            QPlainTextEdit {
+                background-color: #2c3e50;
+                color: #ecf0f1;
+                font-family: 'Consolas', 'Monaco', monospace;
+                font-size: 12px;
+            }
+        """
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle('🤖 自訂模型訓練')
         self.setFixedSize(1000, 700)
         
+        _ensure_trainer_imported()
         self.config = TrainingConfig()
+        # 依主機核心數給資料載入執行緒的初始值，靜態預設常常
+        # 不是餓死 I/O 就是過度搶占 CPU
+        self.config.workers = min(os.cpu_count() or 4, 8)
         self.training_thread = None
         self.dataset_yaml = None
+        self._stats_cache = (None, None)  # (mtime_ns, 已格式化文字)
+        
+        # 把每次按鍵觸發的整份配置重讀合併成 150 毫秒一次；
+        # prepare_dataset/start_training 前仍會同步呼叫 update_config
+        self._cfg_timer = QTimer(self)
+        self._cfg_timer.setSingleShot(True)
+        self._cfg_timer.timeout.connect(self.update_config)
         
         self.setup_ui()
         self.setup_style()
@@ -85,37 +248,28 @@ class ModelTrainingDialog(QDialog):
         # 標題
         title_label = QLabel('🤖 YOLOv8 自訂車輛檢測模型訓練')
         title_label.setAlignment(Qt.AlignCenter)
-        title_label.setStyleSheet("""
-            QLabel {
-                font-size: 20px;
-                font-weight: bold;
-                color: #2c3e50;
-                padding: 10px;
-                margin-bottom: 10px;
-            }
-        """)
+        title_label.setStyleSheet(self._TITLE_STYLE)
         layout.addWidget(title_label)
         
-        # 分頁介面
-        tab_widget = QTabWidget()
+        # 分頁介面；進階與監控分頁延後到第一次切換（或實際需要）才建構，
+        # 縮短對話框開啟時間
+        self.tab_widget = QTabWidget()
         
         # 資料集設定分頁
         dataset_tab = self.create_dataset_tab()
-        tab_widget.addTab(dataset_tab, "📁 資料集設定")
+        self.tab_widget.addTab(dataset_tab, "📁 資料集設定")
         
         # 訓練參數分頁
         training_tab = self.create_training_tab()
-        tab_widget.addTab(training_tab, "⚙️ 訓練參數")
+        self.tab_widget.addTab(training_tab, "⚙️ 訓練參數")
         
-        # 進階設定分頁
-        advanced_tab = self.create_advanced_tab()
-        tab_widget.addTab(advanced_tab, "🔧 進階設定")
+        # 進階設定與訓練監控分頁先放佔位元件
+        self.tab_widget.addTab(QWidget(), "🔧 進階設定")
+        self.tab_widget.addTab(QWidget(), "📊 訓練監控")
+        self._built_tabs = {0, 1}
+        self.tab_widget.currentChanged.connect(self._ensure_tab_built)
         
-        # 訓練監控分頁
-        monitor_tab = self.create_monitor_tab()
-        tab_widget.addTab(monitor_tab, "📊 訓練監控")
-        
-        layout.addWidget(tab_widget)
+        layout.addWidget(self.tab_widget)
         
         # 底部控制按鈕
         button_layout = QHBoxLayout()
@@ -142,6 +296,24 @@ class ModelTrainingDialog(QDialog):
         
         layout.addLayout(button_layout)
     
+    def _ensure_tab_built(self, index: int):
+        """第一次造訪延遲分頁時，把佔位元件換成真正的內容"""
+        if index in self._built_tabs:
+            return
+        self._built_tabs.add(index)
+        
+        if index == 2:
+            widget, label = self.create_advanced_tab(), "🔧 進階設定"
+        elif index == 3:
+            widget, label = self.create_monitor_tab(), "📊 訓練監控"
+        else:
+            return
+        
+        current = self.tab_widget.currentIndex()
+        self.tab_widget.removeTab(index)
+        self.tab_widget.insertTab(index, widget, label)
+        self.tab_widget.setCurrentIndex(current)
+    
     def create_dataset_tab(self) -> QWidget:
         """創建資料集設定分頁"""
         widget = QWidget()
@@ -150,14 +322,16 @@ class ModelTrainingDialog(QDialog):
         # 資料集資訊
         info_group = QGroupBox("📊 資料集資訊")
         info_layout = QFormLayout(info_group)
+        info_layout.setFieldGrowthPolicy(QFormLayout.FieldsStayAtSizeHint)
         
         self.dataset_name_edit = QLineEdit(self.config.dataset_name)
-        self.dataset_name_edit.textChanged.connect(self.update_config)
+        self.dataset_name_edit.textChanged.connect(self._schedule_config_update)
         info_layout.addRow("資料集名稱:", self.dataset_name_edit)
         
         # 資料集分割比例
         split_group = QGroupBox("✂️ 資料集分割")
         split_layout = QFormLayout(split_group)
+        split_layout.setFieldGrowthPolicy(QFormLayout.FieldsStayAtSizeHint)
         
         self.train_ratio_spin = QDoubleSpinBox()
         self.train_ratio_spin.setRange(0.1, 0.9)
@@ -202,9 +376,10 @@ class ModelTrainingDialog(QDialog):
         # 基本訓練參數
         basic_group = QGroupBox("🎯 基本訓練參數")
         basic_layout = QFormLayout(basic_group)
+        basic_layout.setFieldGrowthPolicy(QFormLayout.FieldsStayAtSizeHint)
         
         self.model_name_edit = QLineEdit(self.config.model_name)
-        self.model_name_edit.textChanged.connect(self.update_config)
+        self.model_name_edit.textChanged.connect(self._schedule_config_update)
         basic_layout.addRow("模型名稱:", self.model_name_edit)
         
         self.base_model_combo = QComboBox()
@@ -212,43 +387,44 @@ class ModelTrainingDialog(QDialog):
             "yolov8n.pt", "yolov8s.pt", "yolov8m.pt", "yolov8l.pt", "yolov8x.pt"
         ])
         self.base_model_combo.setCurrentText(self.config.base_model)
-        self.base_model_combo.currentTextChanged.connect(self.update_config)
+        self.base_model_combo.currentTextChanged.connect(self._schedule_config_update)
         basic_layout.addRow("基礎模型:", self.base_model_combo)
         
         self.epochs_spin = QSpinBox()
         self.epochs_spin.setRange(1, 1000)
         self.epochs_spin.setValue(self.config.epochs)
-        self.epochs_spin.valueChanged.connect(self.update_config)
+        self.epochs_spin.valueChanged.connect(self._schedule_config_update)
         basic_layout.addRow("訓練週期 (Epochs):", self.epochs_spin)
         
         self.batch_size_spin = QSpinBox()
         self.batch_size_spin.setRange(1, 128)
         self.batch_size_spin.setValue(self.config.batch_size)
-        self.batch_size_spin.valueChanged.connect(self.update_config)
+        self.batch_size_spin.valueChanged.connect(self._schedule_config_update)
         basic_layout.addRow("批次大小 (Batch Size):", self.batch_size_spin)
         
         self.image_size_combo = QComboBox()
         self.image_size_combo.addItems(["320", "416", "512", "640", "768", "896", "1024"])
         self.image_size_combo.setCurrentText(str(self.config.image_size))
-        self.image_size_combo.currentTextChanged.connect(self.update_config)
+        self.image_size_combo.currentTextChanged.connect(self._schedule_config_update)
         basic_layout.addRow("圖片尺寸:", self.image_size_combo)
         
         # 優化器參數
         optimizer_group = QGroupBox("🔧 優化器參數")
         optimizer_layout = QFormLayout(optimizer_group)
+        optimizer_layout.setFieldGrowthPolicy(QFormLayout.FieldsStayAtSizeHint)
         
         self.learning_rate_spin = QDoubleSpinBox()
         self.learning_rate_spin.setRange(0.0001, 1.0)
         self.learning_rate_spin.setDecimals(4)
         self.learning_rate_spin.setSingleStep(0.001)
         self.learning_rate_spin.setValue(self.config.learning_rate)
-        self.learning_rate_spin.valueChanged.connect(self.update_config)
+        self.learning_rate_spin.valueChanged.connect(self._schedule_config_update)
         optimizer_layout.addRow("學習率:", self.learning_rate_spin)
         
         self.optimizer_combo = QComboBox()
         self.optimizer_combo.addItems(["AdamW", "Adam", "SGD", "RMSprop"])
         self.optimizer_combo.setCurrentText(self.config.optimizer)
-        self.optimizer_combo.currentTextChanged.connect(self.update_config)
+        self.optimizer_combo.currentTextChanged.connect(self._schedule_config_update)
         optimizer_layout.addRow("優化器:", self.optimizer_combo)
         
         self.weight_decay_spin = QDoubleSpinBox()
@@ -256,7 +432,7 @@ class ModelTrainingDialog(QDialog):
         self.weight_decay_spin.setDecimals(4)
         self.weight_decay_spin.setSingleStep(0.0001)
         self.weight_decay_spin.setValue(self.config.weight_decay)
-        self.weight_decay_spin.valueChanged.connect(self.update_config)
+        self.weight_decay_spin.valueChanged.connect(self._schedule_config_update)
         optimizer_layout.addRow("權重衰減:", self.weight_decay_spin)
         
         layout.addWidget(basic_group)
@@ -273,10 +449,11 @@ class ModelTrainingDialog(QDialog):
         # 數據增強
         augmentation_group = QGroupBox("🎨 數據增強")
         augmentation_layout = QFormLayout(augmentation_group)
+        augmentation_layout.setFieldGrowthPolicy(QFormLayout.FieldsStayAtSizeHint)
         
         self.augmentation_cb = QCheckBox()
         self.augmentation_cb.setChecked(self.config.augmentation)
-        self.augmentation_cb.stateChanged.connect(self.update_config)
+        self.augmentation_cb.stateChanged.connect(self._schedule_config_update)
         augmentation_layout.addRow("啟用數據增強:", self.augmentation_cb)
         
         self.mixup_spin = QDoubleSpinBox()
@@ -284,7 +461,7 @@ class ModelTrainingDialog(QDialog):
         self.mixup_spin.setDecimals(2)
         self.mixup_spin.setSingleStep(0.1)
         self.mixup_spin.setValue(self.config.mixup)
-        self.mixup_spin.valueChanged.connect(self.update_config)
+        self.mixup_spin.valueChanged.connect(self._schedule_config_update)
         augmentation_layout.addRow("Mixup 強度:", self.mixup_spin)
         
         self.copy_paste_spin = QDoubleSpinBox()
@@ -292,39 +469,83 @@ class ModelTrainingDialog(QDialog):
         self.copy_paste_spin.setDecimals(2)
         self.copy_paste_spin.setSingleStep(0.1)
         self.copy_paste_spin.setValue(self.config.copy_paste)
-        self.copy_paste_spin.valueChanged.connect(self.update_config)
+        self.copy_paste_spin.valueChanged.connect(self._schedule_config_update)
         augmentation_layout.addRow("Copy-Paste 強度:", self.copy_paste_spin)
         
         # 硬體設定
         hardware_group = QGroupBox("💻 硬體設定")
         hardware_layout = QFormLayout(hardware_group)
+        hardware_layout.setFieldGrowthPolicy(QFormLayout.FieldsStayAtSizeHint)
+        
+        devices = ["auto", "cpu", "cuda", "mps"]
+        if TRAINER_AVAILABLE:
+            # 列出各張 GPU，多卡主機可指定訓練用卡
+            try:
+                import torch
+                devices.extend(f"cuda:{i}" for i in range(torch.cuda.device_count()))
+            except Exception:
+                pass
         
         self.device_combo = QComboBox()
-        self.device_combo.addItems(["auto", "cpu", "cuda", "mps"])
+        self.device_combo.addItems(devices)
         self.device_combo.setCurrentText(self.config.device)
-        self.device_combo.currentTextChanged.connect(self.update_config)
+        self.device_combo.currentTextChanged.connect(self._schedule_config_update)
         hardware_layout.addRow("運算設備:", self.device_combo)
         
+        self.persistent_workers_cb = QCheckBox()
+        self.persistent_workers_cb.setChecked(self.config.persistent_workers)
+        self.persistent_workers_cb.setToolTip("跨 epoch 重用資料載入 worker，"
+                                              "免除每個 epoch 重新 fork 與管線初始化")
+        self.persistent_workers_cb.stateChanged.connect(self._schedule_config_update)
+        hardware_layout.addRow("常駐載入執行緒:", self.persistent_workers_cb)
+        
         self.workers_spin = QSpinBox()
         self.workers_spin.setRange(0, 32)
         self.workers_spin.setValue(self.config.workers)
-        self.workers_spin.valueChanged.connect(self.update_config)
-        hardware_layout.addRow("資料載入執行緒:", self.workers_spin)
+        self.workers_spin.valueChanged.connect(self._schedule_config_update)
+        
+        workers_auto_btn = QPushButton("自動")
+        workers_auto_btn.setMaximumWidth(60)
+        workers_auto_btn.clicked.connect(self.auto_detect_workers)
+        
+        workers_row = QHBoxLayout()
+        workers_row.addWidget(self.workers_spin)
+        workers_row.addWidget(workers_auto_btn)
+        hardware_layout.addRow("資料載入執行緒:", workers_row)
+        
+        self.amp_cb = QCheckBox()
+        self.amp_cb.setChecked(self.config.amp)
+        self.amp_cb.setToolTip("FP16/BF16 混合精度：Ampere+ GPU 約 2 倍吞吐、"
+                               "活化記憶體減半，通常可將批次大小加倍")
+        self.amp_cb.stateChanged.connect(self._schedule_config_update)
+        hardware_layout.addRow("混合精度 (AMP):", self.amp_cb)
+        
+        self.compile_cb = QCheckBox()
+        self.compile_cb.setChecked(self.config.compile)
+        self.compile_cb.stateChanged.connect(self._schedule_config_update)
+        hardware_layout.addRow("圖編譯 (torch.compile):", self.compile_cb)
+        
+        self.export_precision_combo = QComboBox()
+        self.export_precision_combo.addItems(["fp32", "fp16", "int8"])
+        self.export_precision_combo.setCurrentText(self.config.export_precision)
+        self.export_precision_combo.currentTextChanged.connect(self._schedule_config_update)
+        hardware_layout.addRow("匯出精度:", self.export_precision_combo)
         
         # 訓練控制
         control_group = QGroupBox("🎮 訓練控制")
         control_layout = QFormLayout(control_group)
+        control_layout.setFieldGrowthPolicy(QFormLayout.FieldsStayAtSizeHint)
         
         self.patience_spin = QSpinBox()
         self.patience_spin.setRange(5, 200)
         self.patience_spin.setValue(self.config.patience)
-        self.patience_spin.valueChanged.connect(self.update_config)
+        self.patience_spin.valueChanged.connect(self._schedule_config_update)
         control_layout.addRow("早停耐心值:", self.patience_spin)
         
         self.save_period_spin = QSpinBox()
         self.save_period_spin.setRange(1, 100)
         self.save_period_spin.setValue(self.config.save_period)
-        self.save_period_spin.valueChanged.connect(self.update_config)
+        self.save_period_spin.valueChanged.connect(self._schedule_config_update)
         control_layout.addRow("儲存週期:", self.save_period_spin)
         
         layout.addWidget(augmentation_group)
@@ -355,16 +576,12 @@ class ModelTrainingDialog(QDialog):
         log_group = QGroupBox("📝 訓練日誌")
         log_layout = QVBoxLayout(log_group)
         
-        self.log_text = QTextEdit()
+        # QPlainTextEdit 的純文字排版遠比 QTextEdit 便宜；
+        # 上限 5000 行讓 Qt 自動修剪舊日誌，長時間訓練記憶體維持 O(1)
+        self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
-        self.log_text.setStyleSheet("""
-            QTextEdit {
-                background-color: #2c3e50;
-                color: #ecf0f1;
-                font-family: 'Consolas', 'Monaco', monospace;
-                font-size: 12px;
-            }
-        """)
+        self.log_text.setMaximumBlockCount(5000)
+        self.log_text.setStyleSheet(self._LOG_STYLE)
         log_layout.addWidget(self.log_text)
         
         layout.addWidget(progress_group)
@@ -374,55 +591,20 @@ class ModelTrainingDialog(QDialog):
     
     def setup_style(self):
         """設置樣式"""
-        self.setStyleSheet("""
-            QDialog {
-                background-color: #f8f9fa;
-                color: #2c3e50;
-            }
-            
-            QGroupBox {
-                font-weight: bold;
-                border: 2px solid #bdc3c7;
-                border-radius: 8px;
-                margin: 8px 0px;
-                padding-top: 12px;
-                background-color: white;
-            }
-            
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                left: 16px;
-                padding: 4px 8px;
-                background-color: white;
-                border-radius: 4px;
-            }
-            
-            QPushButton {
-                background-color: #3498db;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                border-radius: 6px;
-                font-weight: bold;
-                min-width: 120px;
-            }
-            
-            QPushButton:hover {
-                background-color: #2980b9;
-            }
-            
-            QPushButton:pressed {
-                background-color: #21618c;
-            }
-            
-            QPushButton:disabled {
-                background-color: #bdc3c7;
-                color: #7f8c8d;
-            }
-        """)
+        self.setStyleSheet(self._STYLE_SHEET)
+    
+    def auto_detect_workers(self):
+        """依硬體重新偵測合適的資料載入執行緒數"""
+        self.workers_spin.setValue(self.config.get_optimal_workers())
+
+    def _schedule_config_update(self):
+        """延後重建配置；連續輸入只觸發最後一次"""
+        self._cfg_timer.start(150)
     
     def update_config(self):
         """更新訓練配置"""
+        # 進階分頁可能尚未建構（延遲載入），先確保其元件存在
+        self._ensure_tab_built(2)
         self.config.model_name = self.model_name_edit.text()
         self.config.dataset_name = self.dataset_name_edit.text()
         self.config.base_model = self.base_model_combo.currentText()
@@ -435,39 +617,48 @@ class ModelTrainingDialog(QDialog):
         self.config.augmentation = self.augmentation_cb.isChecked()
         self.config.mixup = self.mixup_spin.value()
         self.config.copy_paste = self.copy_paste_spin.value()
+        
+        # 預先算好增強位元遮罩，強度為 0 的轉換下游一個分支就能跳過，
+        # 不必每個樣本再做機率檢查
+        mask = 0
+        if self.config.mixup > 0:
+            mask |= 1
+        if self.config.copy_paste > 0:
+            mask |= 2
+        if self.config.augmentation:
+            mask |= 4
+        self.config.augment_mask = mask
+        
         self.config.device = self.device_combo.currentText()
         self.config.workers = self.workers_spin.value()
+        self.config.amp = self.amp_cb.isChecked()
+        self.config.persistent_workers = self.persistent_workers_cb.isChecked()
+        self.config.compile = self.compile_cb.isChecked()
+        self.config.export_precision = self.export_precision_combo.currentText()
         self.config.patience = self.patience_spin.value()
         self.config.save_period = self.save_period_spin.value()
     
     def update_split_ratios(self):
         """更新資料集分割比例"""
-        train_ratio = self.train_ratio_spin.value()
-        val_ratio = self.val_ratio_spin.value()
-        test_ratio = self.test_ratio_spin.value()
-        
-        total = train_ratio + val_ratio + test_ratio
-        if abs(total - 1.0) > 0.01:
-            # 自動調整比例
-            train_ratio = train_ratio / total
-            val_ratio = val_ratio / total
-            test_ratio = test_ratio / total
-            
-            self.train_ratio_spin.blockSignals(True)
-            self.val_ratio_spin.blockSignals(True)
-            self.test_ratio_spin.blockSignals(True)
-            
-            self.train_ratio_spin.setValue(train_ratio)
-            self.val_ratio_spin.setValue(val_ratio)
-            self.test_ratio_spin.setValue(test_ratio)
-            
-            self.train_ratio_spin.blockSignals(False)
-            self.val_ratio_spin.blockSignals(False)
-            self.test_ratio_spin.blockSignals(False)
-        
-        self.config.train_ratio = train_ratio
-        self.config.val_ratio = val_ratio
-        self.config.test_ratio = test_ratio
+        ratios = [self.train_ratio_spin.value(),
+                  self.val_ratio_spin.value(),
+                  self.test_ratio_spin.value()]
+
+        total = ratios[0] + ratios[1] + ratios[2]
+        if abs(total - 1.0) <= 0.01:
+            # 總和已為 1，直接寫回配置，不走正規化與 setValue 回寫
+            self.config.train_ratio, self.config.val_ratio, self.config.test_ratio = ratios
+            return
+
+        # 自動調整比例；QSignalBlocker 以 RAII 擋住回寫觸發，
+        # 例外時也不會遺留封鎖狀態
+        ratios = [r / total for r in ratios]
+        spins = (self.train_ratio_spin, self.val_ratio_spin, self.test_ratio_spin)
+        for spin, value in zip(spins, ratios):
+            with QSignalBlocker(spin):
+                spin.setValue(value)
+
+        self.config.train_ratio, self.config.val_ratio, self.config.test_ratio = ratios
     
     def prepare_dataset(self):
         """準備資料集"""
@@ -478,37 +669,45 @@ class ModelTrainingDialog(QDialog):
             )
             return
         
-        try:
-            self.prepare_btn.setEnabled(False)
-            self.status_label.setText("正在準備資料集...")
-            
-            # 創建資料集準備器
-            preparer = DatasetPreparer(source_dir=".", output_dir="datasets")
-            
-            # 更新配置
-            self.update_config()
-            
-            # 準備資料集
-            self.dataset_yaml = preparer.prepare_yolo_dataset(self.config)
-            
-            # 載入統計資訊
-            self.load_dataset_statistics()
-            
-            self.start_btn.setEnabled(True)
-            self.status_label.setText("資料集準備完成，可以開始訓練")
-            
-            QMessageBox.information(
-                self, "資料集準備完成",
-                f"資料集已成功準備！\n配置檔案：{self.dataset_yaml}"
-            )
-            
-        except Exception as e:
-            QMessageBox.critical(
-                self, "資料集準備失敗",
-                f"準備資料集時發生錯誤：\n{str(e)}"
-            )
-        finally:
-            self.prepare_btn.setEnabled(True)
+        # 監控分頁的狀態元件為延遲建構，先確保存在
+        self._ensure_tab_built(3)
+        
+        self.prepare_btn.setEnabled(False)
+        self.status_label.setText("正在準備資料集...")
+        
+        # 更新配置（同步，確保拿到最新快照）
+        self.update_config()
+        
+        # 丟到執行緒池準備，事件迴圈保持運轉，介面不凍結
+        preparer = DatasetPreparer(source_dir=".", output_dir="datasets")
+        self._prepare_runnable = PrepareRunnable(preparer, self.config)
+        self._prepare_runnable.signals.finished.connect(self._on_prepare_done)
+        self._prepare_runnable.signals.failed.connect(self._on_prepare_failed)
+        QThreadPool.globalInstance().start(self._prepare_runnable)
+    
+    def _on_prepare_done(self, yaml_path: str):
+        """資料集準備完成（主執行緒）"""
+        self.dataset_yaml = yaml_path
+        self.load_dataset_statistics()
+        
+        self.prepare_btn.setEnabled(True)
+        self.start_btn.setEnabled(True)
+        self.status_label.setText("資料集準備完成，可以開始訓練")
+        
+        QMessageBox.information(
+            self, "資料集準備完成",
+            f"資料集已成功準備！\n配置檔案：{self.dataset_yaml}"
+        )
+    
+    def _on_prepare_failed(self, error_message: str):
+        """資料集準備失敗（主執行緒）"""
+        self.prepare_btn.setEnabled(True)
+        self.status_label.setText("資料集準備失敗")
+        
+        QMessageBox.critical(
+            self, "資料集準備失敗",
+            f"準備資料集時發生錯誤：\n{error_message}"
+        )
     
     def load_dataset_statistics(self):
         """載入資料集統計資訊"""
@@ -520,21 +719,34 @@ class ModelTrainingDialog(QDialog):
         
         if stats_file.exists():
             try:
-                with open(stats_file, 'r', encoding='utf-8') as f:
-                    stats = json.load(f)
+                # 以 mtime 為鍵快取格式化結果，檔案沒變就不重新解析
+                mtime = stats_file.stat().st_mtime_ns
+                if self._stats_cache[0] == mtime:
+                    self.dataset_stats_text.setPlainText(self._stats_cache[1])
+                    return
                 
-                stats_text = "📊 資料集統計資訊:\n\n"
-                
-                for split, data in stats['splits'].items():
-                    stats_text += f"{split.upper()}:\n"
-                    stats_text += f"  圖片: {data['images']} 張\n"
-                    stats_text += f"  標註: {data['annotations']} 個\n"
-                    
+                def format_split(split, data):
+                    lines = [f"{split.upper()}:",
+                             f"  圖片: {data['images']} 張",
+                             f"  標註: {data['annotations']} 個"]
                     if data['class_distribution']:
-                        stats_text += f"  類別分布: {data['class_distribution']}\n"
-                    
-                    stats_text += "\n"
+                        lines.append(f"  類別分布: {data['class_distribution']}")
+                    return "\n".join(lines)
+                
+                if IJSON_AVAILABLE:
+                    # 逐鍵串流 splits，不必先把整個物件圖建進記憶體
+                    with open(stats_file, 'rb') as f:
+                        blocks = [format_split(split, data)
+                                  for split, data in ijson.kvitems(f, 'splits')]
+                else:
+                    with open(stats_file, 'r', encoding='utf-8') as f:
+                        stats = json.load(f)
+                    blocks = [format_split(split, data)
+                              for split, data in stats['splits'].items()]
+                
+                stats_text = "📊 資料集統計資訊:\n\n" + "\n\n".join(blocks) + "\n"
                 
+                self._stats_cache = (mtime, stats_text)
                 self.dataset_stats_text.setPlainText(stats_text)
                 
             except Exception as e:
@@ -562,6 +774,7 @@ class ModelTrainingDialog(QDialog):
             return
         
         # 開始訓練
+        self._ensure_tab_built(3)
         self.start_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
         self.prepare_btn.setEnabled(False)
@@ -583,8 +796,27 @@ class ModelTrainingDialog(QDialog):
         # 開始訓練
         self.training_thread.start()
         
+        # 每 100 毫秒整批刷新一次訓練日誌
+        self._log_timer = QTimer(self)
+        self._log_timer.timeout.connect(self._drain_logs)
+        self._log_timer.start(100)
+        
         self.status_label.setText("訓練進行中...")
-        self.log_text.append("🚀 開始模型訓練...")
+        self.log_text.appendPlainText("🚀 開始模型訓練...")
+    
+    def _drain_logs(self):
+        """把工作執行緒緩衝的日誌一次寫入介面"""
+        if not self.training_thread:
+            return
+        batch = self.training_thread.drain()
+        if batch:
+            self.update_log(batch)
+    
+    def _stop_log_timer(self):
+        """停止日誌計時器並刷出殘留的批次"""
+        if getattr(self, '_log_timer', None):
+            self._log_timer.stop()
+        self._drain_logs()
     
     def stop_training(self):
         """停止訓練"""
@@ -596,15 +828,16 @@ class ModelTrainingDialog(QDialog):
             )
             
             if reply == QMessageBox.Yes:
-                self.training_thread.terminate()
-                self.training_thread.wait()
+                self.training_thread.request_stop()
+                self.training_thread.wait(30000)
+                self._stop_log_timer()
                 
                 self.start_btn.setEnabled(True)
                 self.stop_btn.setEnabled(False)
                 self.prepare_btn.setEnabled(True)
                 
                 self.status_label.setText("訓練已停止")
-                self.log_text.append("⏹️ 訓練已被用戶停止")
+                self.log_text.appendPlainText("⏹️ 訓練已被用戶停止")
     
     def update_progress(self, progress: int):
         """更新進度"""
@@ -614,15 +847,12 @@ class ModelTrainingDialog(QDialog):
     def update_log(self, message: str):
         """更新日誌"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.log_text.append(f"[{timestamp}] {message}")
-        
-        # 自動滾動到最後
-        cursor = self.log_text.textCursor()
-        cursor.movePosition(cursor.End)
-        self.log_text.setTextCursor(cursor)
+        # appendPlainText 會自動捲動到底，不需手動移動游標
+        self.log_text.appendPlainText(f"[{timestamp}] {message}")
     
     def on_training_completed(self, model_path: str):
         """訓練完成"""
+        self._stop_log_timer()
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         self.prepare_btn.setEnabled(True)
@@ -639,6 +869,7 @@ class ModelTrainingDialog(QDialog):
     
     def on_training_failed(self, error_message: str):
         """訓練失敗"""
+        self._stop_log_timer()
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         self.prepare_btn.setEnabled(True)
@@ -3,19 +3,23 @@
 提供自定義車種功能，包括新增、編輯、刪除車種類別
 """
 
+import atexit
 import json
 import os
+from contextlib import contextmanager
 from typing import List, Dict, Tuple, Optional
+
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
     QListWidget, QListWidgetItem, QLineEdit, QColorDialog,
     QInputDialog, QMessageBox, QGroupBox, QFormLayout,
     QSpinBox, QCheckBox, QTextEdit, QTabWidget, QWidget,
     QTableWidget, QTableWidgetItem, QHeaderView, QComboBox,
-    QDialogButtonBox, QFrame, QSplitter, QFileDialog, QApplication
+    QDialogButtonBox, QFrame, QSplitter, QFileDialog, QApplication,
+    QMenu
 )
-from PyQt5.QtGui import QColor, QPixmap, QPainter, QIcon
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QPixmap, QPainter, QIcon, QCursor
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 
 
 # 導入樣式表
@@ -26,12 +30,104 @@ except ImportError:
     STYLE_AVAILABLE = False
     print("樣式表模組不可用，使用預設樣式")
 
+# 可選的高速 JSON 函式庫
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 已解析配置的程序內快取：{絕對路徑: (mtime, data)}
+# 讓同一配置檔的重複載入（例如對話框重開）免去再次讀檔解析
+_CONFIG_CACHE: Dict[str, Tuple[float, Dict]] = {}
+
+# 日誌累積多少筆增量後觸發壓實（重寫基底檔並清空日誌）
+_JOURNAL_COMPACT_EVERY = 50
+
+# Qt 列舉的模組層級別名，省去表格迴圈中重複的屬性查找
+_USER_ROLE = Qt.UserRole
+_NON_EDITABLE_MASK = ~Qt.ItemIsEditable
+
+# 顏色預覽方塊的樣式模板
+_COLOR_STYLE_FMT = "background-color: %s; border: 1px solid black;"
+
+# 預設車種模板（模組層級建立一次；tuple 避免被意外修改）
+_TEMPLATES = {
+    "basic": (
+        {'name': '機車', 'emoji': '🏍', 'shortcut_key': '1'},
+        {'name': '汽車', 'emoji': '🚗', 'shortcut_key': '2'},
+        {'name': '卡車', 'emoji': '🚛', 'shortcut_key': '3'},
+        {'name': '公車', 'emoji': '🚌', 'shortcut_key': '4'},
+    ),
+    "detailed": (
+        {'name': '機車', 'emoji': '🏍', 'shortcut_key': '1'},
+        {'name': '汽車', 'emoji': '🚗', 'shortcut_key': '2'},
+        {'name': '卡車', 'emoji': '🚛', 'shortcut_key': '3'},
+        {'name': '公車', 'emoji': '🚌', 'shortcut_key': '4'},
+        {'name': '計程車', 'emoji': '🚕', 'shortcut_key': '5'},
+        {'name': '警車', 'emoji': '🚓', 'shortcut_key': '6'},
+        {'name': '救護車', 'emoji': '🚑', 'shortcut_key': '7'},
+        {'name': '消防車', 'emoji': '🚒', 'shortcut_key': '8'},
+    ),
+    "transport": (
+        {'name': '機車', 'emoji': '🏍', 'shortcut_key': '1'},
+        {'name': '汽車', 'emoji': '🚗', 'shortcut_key': '2'},
+        {'name': '卡車', 'emoji': '🚛', 'shortcut_key': '3'},
+        {'name': '公車', 'emoji': '🚌', 'shortcut_key': '4'},
+        {'name': '腳踏車', 'emoji': '🚲', 'shortcut_key': '5'},
+        {'name': '電動車', 'emoji': '🔋', 'shortcut_key': '6'},
+        {'name': '三輪車', 'emoji': '🛺', 'shortcut_key': '7'},
+        {'name': '計程車', 'emoji': '🚕', 'shortcut_key': '8'},
+    ),
+    "commercial": (
+        {'name': '小貨車', 'emoji': '🚚', 'shortcut_key': '1'},
+        {'name': '中型貨車', 'emoji': '🚛', 'shortcut_key': '2'},
+        {'name': '大型貨車', 'emoji': '🚛', 'shortcut_key': '3'},
+        {'name': '聯結車', 'emoji': '🚛', 'shortcut_key': '4'},
+        {'name': '工程車', 'emoji': '🚜', 'shortcut_key': '5'},
+        {'name': '混凝土車', 'emoji': '🚚', 'shortcut_key': '6'},
+    ),
+}
+
+
+# 預設標註顏色調色盤（模組層級建立一次，避免每個實例重複配置）
+_DEFAULT_COLORS = (
+    QColor(255, 75, 75),    # 紅色
+    QColor(75, 255, 75),    # 綠色
+    QColor(75, 150, 255),   # 藍色
+    QColor(255, 215, 0),    # 金黃色
+    QColor(255, 165, 0),    # 橙色
+    QColor(147, 112, 219),  # 紫色
+    QColor(255, 192, 203),  # 粉紅色
+    QColor(0, 255, 255),    # 青色
+    QColor(255, 255, 0),    # 黃色
+    QColor(255, 20, 147),   # 深粉紅
+)
+
+# 車種名稱對應的預設表情符號
+_EMOJI_MAP = {
+    '機車': '🏍', '摩托車': '🏍',
+    '汽車': '🚗', '小客車': '🚗', '轎車': '🚗',
+    '卡車': '🚛', '貨車': '🚛', '載貨車': '🚛',
+    '公車': '🚌', '巴士': '🚌', '客運': '🚌',
+    '計程車': '🚕', '的士': '🚕',
+    '警車': '🚓',
+    '救護車': '🚑',
+    '消防車': '🚒',
+    '腳踏車': '🚲', '自行車': '🚲',
+    '三輪車': '🛺'
+}
+
 
 class VehicleClass:
     """車種類別資料結構"""
-    
-    def __init__(self, class_id: int, name: str, color: QColor = None, 
-                 description: str = "", enabled: bool = True, 
+
+    __slots__ = ('class_id', 'name', '_color', 'description',
+                 'enabled', 'shortcut_key', 'emoji',
+                 '_rgba_cached', '_color_name')
+
+    def __init__(self, class_id: int, name: str, color: QColor = None,
+                 description: str = "", enabled: bool = True,
                  shortcut_key: str = "", emoji: str = "🚗"):
         self.class_id = class_id
         self.name = name
@@ -40,51 +136,58 @@ class VehicleClass:
         self.enabled = enabled
         self.shortcut_key = shortcut_key
         self.emoji = emoji
-    
+
+    @property
+    def color(self) -> QColor:
+        return self._color
+
+    @color.setter
+    def color(self, value: QColor):
+        self._color = value
+        self._rgba_cached = None
+        self._color_name = None
+
+    @property
+    def color_name(self) -> str:
+        """顏色的十六進位字串（延遲計算並快取）"""
+        if self._color_name is None:
+            self._color_name = self._color.name()
+        return self._color_name
+
     def _get_default_color(self, class_id: int) -> QColor:
-        """根據 ID 生成預設顏色"""
-        default_colors = [
-            QColor(255, 75, 75),    # 紅色
-            QColor(75, 255, 75),    # 綠色
-            QColor(75, 150, 255),   # 藍色
-            QColor(255, 215, 0),    # 金黃色
-            QColor(255, 165, 0),    # 橙色
-            QColor(147, 112, 219),  # 紫色
-            QColor(255, 192, 203),  # 粉紅色
-            QColor(0, 255, 255),    # 青色
-            QColor(255, 255, 0),    # 黃色
-            QColor(255, 20, 147),   # 深粉紅
-        ]
-        return default_colors[class_id % len(default_colors)]
+        """根據 ID 取得預設顏色"""
+        return _DEFAULT_COLORS[class_id % len(_DEFAULT_COLORS)]
     
     def to_dict(self) -> Dict:
         """轉換為字典格式"""
+        rgba = self._rgba_cached
+        if rgba is None:
+            rgba = self._rgba_cached = self._color.rgba()
         return {
             'class_id': self.class_id,
             'name': self.name,
-            'color': {
-                'r': self.color.red(),
-                'g': self.color.green(),
-                'b': self.color.blue(),
-                'a': self.color.alpha()
-            },
+            'color': rgba,  # 打包成單一 uint32（AARRGGBB）
             'description': self.description,
             'enabled': self.enabled,
             'shortcut_key': self.shortcut_key,
             'emoji': self.emoji
         }
-    
+
     @classmethod
     def from_dict(cls, data: Dict) -> 'VehicleClass':
         """從字典創建物件"""
         color_data = data.get('color', {})
-        color = QColor(
-            color_data.get('r', 255),
-            color_data.get('g', 75),
-            color_data.get('b', 75),
-            color_data.get('a', 255)
-        )
-        
+        if isinstance(color_data, int):
+            color = QColor.fromRgba(color_data)
+        else:
+            # 舊版配置以 r/g/b/a 字典儲存
+            color = QColor(
+                color_data.get('r', 255),
+                color_data.get('g', 75),
+                color_data.get('b', 75),
+                color_data.get('a', 255)
+            )
+
         return cls(
             class_id=data['class_id'],
             name=data['name'],
@@ -103,34 +206,172 @@ class VehicleClassManager:
         self.config_file = config_file
         self.classes = {}  # {class_id: VehicleClass}
         self.next_id = 0
+        self._batch_depth = 0
+        self._dirty = False
+        self._mtime = 0.0
+        self._journal_edits = 0
+        self._name_index = {}      # {name: class_id}
+        self._shortcut_index = {}  # {shortcut_key: class_id}
+        self._sorted_cache = None  # get_all_classes 的排序結果快取
+        self._colors_cache = None  # get_class_colors 的映射快取
         self.load_classes()
+        atexit.register(self._flush)
+
+    @contextmanager
+    def batch_update(self):
+        """批次修改期間暫停寫檔，結束時一次儲存"""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._dirty:
+                self._flush()
+
+    def _flush(self):
+        """將尚未寫入的變更儲存到磁碟"""
+        if self._dirty or self._journal_edits:
+            self._dirty = False
+            self.save_classes()
+
+    def _journal_path(self) -> str:
+        base, _ = os.path.splitext(self.config_file)
+        return base + '.journal'
+
+    def _append_journal(self, entry: Dict):
+        """附加單筆增量變更到日誌檔，取代整檔重寫"""
+        if self._batch_depth > 0:
+            self._dirty = True
+            return
+
+        try:
+            if ORJSON_AVAILABLE:
+                line = orjson.dumps(entry) + b'\n'
+            else:
+                line = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+            with open(self._journal_path(), 'ab') as f:
+                f.write(line)
+            self._journal_edits += 1
+            if self._journal_edits >= _JOURNAL_COMPACT_EVERY:
+                self.save_classes()
+        except Exception as e:
+            print(f"寫入車種日誌失敗: {e}")
+            self.save_classes()
+
+    def _replay_journal(self):
+        """將日誌中的增量變更套用到已載入的類別"""
+        journal = self._journal_path()
+        if not os.path.exists(journal):
+            return
+
+        try:
+            loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+            with open(journal, 'rb') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    entry = loads(line)
+                    op = entry.get('op')
+                    if op == 'delete':
+                        self.classes.pop(entry['class_id'], None)
+                    elif op in ('add', 'update'):
+                        vehicle_class = VehicleClass.from_dict(entry['class'])
+                        self.classes[vehicle_class.class_id] = vehicle_class
+
+            if self.classes:
+                self.next_id = max(self.classes.keys()) + 1
+
+        except Exception as e:
+            print(f"重播車種日誌失敗: {e}")
     
     def load_classes(self):
         """載入車種類別配置"""
         if os.path.exists(self.config_file):
             try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                self.classes = {}
-                for class_data in data.get('classes', []):
-                    vehicle_class = VehicleClass.from_dict(class_data)
-                    self.classes[vehicle_class.class_id] = vehicle_class
-                
-                self.next_id = data.get('next_id', len(self.classes))
-                
+                config_path = os.path.abspath(self.config_file)
+                mtime = os.path.getmtime(config_path)
+
+                # 檔案未變更時直接重用程序內的解析結果
+                cached = _CONFIG_CACHE.get(config_path)
+                if cached is not None and cached[0] == mtime:
+                    data = cached[1]
+                else:
+                    with open(self.config_file, 'rb') as f:
+                        raw = f.read()
+                    data = orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+                    _CONFIG_CACHE[config_path] = (mtime, data)
+
+                self._mtime = mtime
+
+                # 單次掃描同時建表與推算 next_id
+                loaded = [VehicleClass.from_dict(cd) for cd in data.get('classes', [])]
+                self.classes = {cls.class_id: cls for cls in loaded}
+                self.next_id = max((cls.class_id for cls in loaded), default=-1) + 1
+
+                self._replay_journal()
+
             except Exception as e:
                 print(f"載入車種配置失敗: {e}")
                 self._load_default_classes()
         else:
             self._load_default_classes()
-        
-        # 確保 next_id 正確
-        if self.classes:
-            self.next_id = max(self.classes.keys()) + 1
+
+        self._rebuild_indexes()
+
+    def load_classes_from_data(self, data: Dict):
+        """直接從已解析的配置資料重建狀態，跳過讀檔與解析"""
+        loaded = [VehicleClass.from_dict(cd) for cd in data.get('classes', [])]
+        self.classes = {cls.class_id: cls for cls in loaded}
+        self.next_id = max((cls.class_id for cls in loaded), default=-1) + 1
+        self._rebuild_indexes()
+
+        # 傳入的資料就是完整的最新狀態，匯入前殘留的增量日誌必須作廢，
+        # 否則下次載入會把舊日誌重播到新設定上
+        journal = self._journal_path()
+        if os.path.exists(journal):
+            os.remove(journal)
+        self._journal_edits = 0
+
+        try:
+            config_path = os.path.abspath(self.config_file)
+            self._mtime = os.path.getmtime(config_path)
+            _CONFIG_CACHE[config_path] = (self._mtime, data)
+        except OSError:
+            pass
+
+    def reload_if_changed(self) -> bool:
+        """檔案 mtime 有變化時才重新載入，回傳是否有重載"""
+        try:
+            if os.path.getmtime(self.config_file) == self._mtime:
+                return False
+        except OSError:
+            pass
+        self.load_classes()
+        return True
+
+    def _rebuild_indexes(self):
+        """重建名稱與快捷鍵的查詢索引"""
+        self._name_index = {cls.name: cid for cid, cls in self.classes.items()}
+        self._shortcut_index = {
+            cls.shortcut_key: cid
+            for cid, cls in self.classes.items() if cls.shortcut_key
+        }
+        self._invalidate_caches()
+
+    def _invalidate_caches(self):
+        """類別內容變更時清除衍生快取"""
+        self._sorted_cache = None
+        self._colors_cache = None
     
     def _load_default_classes(self):
-        """載入預設車種類別"""
+        """載入預設車種類別並寫回配置檔"""
+        self._init_default_classes_in_memory()
+        # 只有缺檔或解析失敗才會走到這裡，此時需要把預設值落地
+        self.save_classes()
+
+    def _init_default_classes_in_memory(self):
+        """在記憶體中建立預設車種類別（不寫檔）"""
         default_classes = [
             {'name': '機車', 'emoji': '🏍', 'shortcut_key': '1', 'description': '兩輪機車'},
             {'name': '汽車', 'emoji': '🚗', 'shortcut_key': '2', 'description': '一般乘用車'},
@@ -150,10 +391,14 @@ class VehicleClassManager:
             self.classes[i] = vehicle_class
         
         self.next_id = len(default_classes)
-        self.save_classes()
+        self._rebuild_indexes()
     
     def save_classes(self):
         """儲存車種類別配置"""
+        if self._batch_depth > 0:
+            self._dirty = True
+            return
+
         try:
             data = {
                 'classes': [cls.to_dict() for cls in self.classes.values()],
@@ -161,9 +406,29 @@ class VehicleClassManager:
                 'version': '1.0'
             }
             
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-                
+            if ORJSON_AVAILABLE:
+                payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+            else:
+                # 先序列化成單一字串再一次寫入，避免 json.dump 的逐塊小寫入
+                payload = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+            # 先寫暫存檔再原子替換，避免寫到一半留下壞檔
+            tmp_file = f"{self.config_file}.{os.getpid()}.tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_file, self.config_file)
+
+            config_path = os.path.abspath(self.config_file)
+            self._mtime = os.path.getmtime(config_path)
+            _CONFIG_CACHE[config_path] = (self._mtime, data)
+            self._dirty = False
+
+            # 基底檔已是完整狀態，壓實後清空增量日誌
+            journal = self._journal_path()
+            if os.path.exists(journal):
+                os.remove(journal)
+            self._journal_edits = 0
+
         except Exception as e:
             print(f"儲存車種配置失敗: {e}")
             raise
@@ -175,15 +440,12 @@ class VehicleClassManager:
             raise ValueError("車種名稱不能為空")
         
         # 檢查名稱是否重複
-        for cls in self.classes.values():
-            if cls.name == name:
-                raise ValueError(f"車種名稱 '{name}' 已存在")
-        
+        if name in self._name_index:
+            raise ValueError(f"車種名稱 '{name}' 已存在")
+
         # 檢查快捷鍵是否重複
-        if shortcut_key:
-            for cls in self.classes.values():
-                if cls.shortcut_key == shortcut_key:
-                    raise ValueError(f"快捷鍵 '{shortcut_key}' 已被使用")
+        if shortcut_key and shortcut_key in self._shortcut_index:
+            raise ValueError(f"快捷鍵 '{shortcut_key}' 已被使用")
         
         class_id = self.next_id
         vehicle_class = VehicleClass(
@@ -196,9 +458,13 @@ class VehicleClassManager:
         )
         
         self.classes[class_id] = vehicle_class
+        self._name_index[name] = class_id
+        if shortcut_key:
+            self._shortcut_index[shortcut_key] = class_id
         self.next_id += 1
-        self.save_classes()
-        
+        self._invalidate_caches()
+        self._append_journal({'op': 'add', 'class': vehicle_class.to_dict()})
+
         return class_id
     
     def update_class(self, class_id: int, name: str = None, color: QColor = None,
@@ -214,9 +480,11 @@ class VehicleClassManager:
             if not name.strip():
                 raise ValueError("車種名稱不能為空")
             # 檢查名稱是否與其他類別重複
-            for cid, cls in self.classes.items():
-                if cid != class_id and cls.name == name:
-                    raise ValueError(f"車種名稱 '{name}' 已存在")
+            existing = self._name_index.get(name)
+            if existing is not None and existing != class_id:
+                raise ValueError(f"車種名稱 '{name}' 已存在")
+            self._name_index.pop(vehicle_class.name, None)
+            self._name_index[name] = class_id
             vehicle_class.name = name
         
         if color is not None:
@@ -231,41 +499,66 @@ class VehicleClassManager:
         if shortcut_key is not None:
             # 檢查快捷鍵是否與其他類別重複
             if shortcut_key:
-                for cid, cls in self.classes.items():
-                    if cid != class_id and cls.shortcut_key == shortcut_key:
-                        raise ValueError(f"快捷鍵 '{shortcut_key}' 已被使用")
+                existing = self._shortcut_index.get(shortcut_key)
+                if existing is not None and existing != class_id:
+                    raise ValueError(f"快捷鍵 '{shortcut_key}' 已被使用")
+            if vehicle_class.shortcut_key:
+                self._shortcut_index.pop(vehicle_class.shortcut_key, None)
+            if shortcut_key:
+                self._shortcut_index[shortcut_key] = class_id
             vehicle_class.shortcut_key = shortcut_key
         
         if emoji is not None:
             vehicle_class.emoji = emoji
-        
-        self.save_classes()
+
+        self._invalidate_caches()
+        self._append_journal({'op': 'update', 'class': vehicle_class.to_dict()})
     
     def delete_class(self, class_id: int):
         """刪除車種類別"""
         if class_id not in self.classes:
             raise ValueError(f"車種 ID {class_id} 不存在")
-        
-        del self.classes[class_id]
-        self.save_classes()
+
+        vehicle_class = self.classes.pop(class_id)
+        self._name_index.pop(vehicle_class.name, None)
+        if vehicle_class.shortcut_key:
+            self._shortcut_index.pop(vehicle_class.shortcut_key, None)
+        self._invalidate_caches()
+        self._append_journal({'op': 'delete', 'class_id': class_id})
     
+    def bulk_set_classes(self, class_dicts: List[Dict]):
+        """以一批類別定義整批取代現有類別，只寫檔一次"""
+        self.classes = {
+            i: VehicleClass(class_id=i, **cls_data)
+            for i, cls_data in enumerate(class_dicts)
+        }
+        self.next_id = len(self.classes)
+        self._rebuild_indexes()
+        self.save_classes()
+
     def get_class(self, class_id: int) -> Optional[VehicleClass]:
         """取得車種類別"""
         return self.classes.get(class_id)
     
     def get_all_classes(self, enabled_only: bool = False) -> List[VehicleClass]:
         """取得所有車種類別"""
-        classes = list(self.classes.values())
+        if self._sorted_cache is None:
+            self._sorted_cache = sorted(
+                self.classes.values(), key=lambda x: x.class_id
+            )
         if enabled_only:
-            classes = [cls for cls in classes if cls.enabled]
-        return sorted(classes, key=lambda x: x.class_id)
+            return [cls for cls in self._sorted_cache if cls.enabled]
+        return list(self._sorted_cache)
     
     def get_class_by_name(self, name: str) -> Optional[VehicleClass]:
         """根據名稱取得車種類別"""
-        for cls in self.classes.values():
-            if cls.name == name:
-                return cls
-        return None
+        class_id = self._name_index.get(name)
+        return self.classes.get(class_id) if class_id is not None else None
+
+    def get_class_by_shortcut(self, shortcut_key: str) -> Optional[VehicleClass]:
+        """根據快捷鍵取得車種類別"""
+        class_id = self._shortcut_index.get(shortcut_key)
+        return self.classes.get(class_id) if class_id is not None else None
     
     def get_classes_for_combo(self, enabled_only: bool = True) -> List[Tuple[str, int]]:
         """取得適用於下拉選單的車種清單"""
@@ -274,7 +567,11 @@ class VehicleClassManager:
     
     def get_class_colors(self) -> Dict[int, QColor]:
         """取得所有車種的顏色映射"""
-        return {class_id: cls.color for class_id, cls in self.classes.items()}
+        if self._colors_cache is None:
+            self._colors_cache = {
+                class_id: cls.color for class_id, cls in self.classes.items()
+            }
+        return self._colors_cache
     
     def export_classes_txt(self, filename: str = "classes.txt"):
         """匯出車種清單到文字檔案（YOLO格式）"""
@@ -294,41 +591,24 @@ class VehicleClassManager:
             if not os.path.exists(filename):
                 return False
             
+            # 逐行串流收集非空白名稱，只在非空白行遞增 ID
             with open(filename, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            # 清除現有類別
-            self.classes = {}
-            self.next_id = 0
-            
-            # 導入新類別
-            for i, line in enumerate(lines):
-                name = line.strip()
-                if name:
-                    # 生成預設表情符號
-                    emoji_map = {
-                        '機車': '🏍', '摩托車': '🏍',
-                        '汽車': '🚗', '小客車': '🚗', '轎車': '🚗',
-                        '卡車': '🚛', '貨車': '🚛', '載貨車': '🚛',
-                        '公車': '🚌', '巴士': '🚌', '客運': '🚌',
-                        '計程車': '🚕', '的士': '🚕',
-                        '警車': '🚓',
-                        '救護車': '🚑',
-                        '消防車': '🚒',
-                        '腳踏車': '🚲', '自行車': '🚲',
-                        '三輪車': '🛺'
-                    }
-                    emoji = emoji_map.get(name, '🚗')
-                    
-                    vehicle_class = VehicleClass(
-                        class_id=i,
-                        name=name,
-                        emoji=emoji,
-                        shortcut_key=str(i+1) if i < 9 else ""
-                    )
-                    self.classes[i] = vehicle_class
-            
-            self.next_id = len(self.classes)
+                names = [name for name in (line.strip() for line in f) if name]
+
+            # 先建好所有類別，再以 C 層級的 dict 建構子一次性建表
+            new_items = [
+                (i, VehicleClass(
+                    class_id=i,
+                    name=name,
+                    emoji=_EMOJI_MAP.get(name, '🚗'),
+                    shortcut_key=str(i + 1) if i < 9 else ""
+                ))
+                for i, name in enumerate(names)
+            ]
+
+            self.classes = dict(new_items)
+            self.next_id = len(new_items)
+            self._rebuild_indexes()
             self.save_classes()
             return True
             
@@ -345,6 +625,9 @@ class VehicleClassManagerDialog(QDialog):
     def __init__(self, class_manager: VehicleClassManager, parent=None):
         super().__init__(parent)
         self.class_manager = class_manager
+        self._color_menu = None  # 常用顏色快選選單（延遲建構）
+        self._last_import_dir = os.path.expanduser('~')  # 記住上次匯入目錄
+        self._save_pending = False  # 是否已排定延後寫檔
         self.setWindowTitle('車種類別管理')
         self.setFixedSize(900, 700)
         
@@ -386,23 +669,21 @@ class VehicleClassManagerDialog(QDialog):
     def setup_ui(self):
         """設定使用者介面"""
         layout = QVBoxLayout(self)
-        
+
         # 創建分頁介面
-        tab_widget = QTabWidget()
-        
+        self.tab_widget = QTabWidget()
+
         # 車種管理分頁
         manage_tab = self.create_manage_tab()
-        tab_widget.addTab(manage_tab, "🚗 車種管理")
-        
-        # 匯入匯出分頁
-        import_export_tab = self.create_import_export_tab()
-        tab_widget.addTab(import_export_tab, "📁 匯入匯出")
-        
-        # 預設模板分頁
-        templates_tab = self.create_templates_tab()
-        tab_widget.addTab(templates_tab, "📋 預設模板")
-        
-        layout.addWidget(tab_widget)
+        self.tab_widget.addTab(manage_tab, "🚗 車種管理")
+
+        # 匯入匯出與預設模板分頁先放佔位元件，首次切換時才建構
+        self.tab_widget.addTab(QWidget(), "📁 匯入匯出")
+        self.tab_widget.addTab(QWidget(), "📋 預設模板")
+        self._built_tabs = {0}
+        self.tab_widget.currentChanged.connect(self._ensure_tab_built)
+
+        layout.addWidget(self.tab_widget)
         
         # 底部按鈕
         button_box = QDialogButtonBox(
@@ -412,6 +693,26 @@ class VehicleClassManagerDialog(QDialog):
         button_box.rejected.connect(self.reject)
         button_box.button(QDialogButtonBox.Apply).clicked.connect(self.apply_changes)
         layout.addWidget(button_box)
+
+    def _ensure_tab_built(self, index: int):
+        """首次切換到延遲建構的分頁時替換佔位元件"""
+        if index in self._built_tabs:
+            return
+
+        builders = {
+            1: (self.create_import_export_tab, "📁 匯入匯出"),
+            2: (self.create_templates_tab, "📋 預設模板"),
+        }
+        builder = builders.get(index)
+        if builder is None:
+            return
+
+        self._built_tabs.add(index)
+        widget = builder[0]()
+        current = self.tab_widget.currentIndex()
+        self.tab_widget.removeTab(index)
+        self.tab_widget.insertTab(index, widget, builder[1])
+        self.tab_widget.setCurrentIndex(current)
     
     def create_manage_tab(self) -> QWidget:
         """創建車種管理分頁"""
@@ -661,42 +962,76 @@ class VehicleClassManagerDialog(QDialog):
         
         return widget
     
-    def load_classes_list(self):
-        """載入車種清單到表格"""
+    def load_classes_list(self, changed_class_id: int = None):
+        """載入車種清單到表格
+
+        傳入 changed_class_id 時僅就地更新該列，避免整表重建。
+        """
+        if changed_class_id is not None:
+            vehicle_class = self.class_manager.get_class(changed_class_id)
+            if vehicle_class:
+                for row in range(self.class_table.rowCount()):
+                    item = self.class_table.item(row, 0)
+                    if item and item.data(_USER_ROLE) == changed_class_id:
+                        self.class_table.blockSignals(True)
+                        self._set_row_items(row, vehicle_class)
+                        self.class_table.blockSignals(False)
+                        return
+
         classes = self.class_manager.get_all_classes()
-        self.class_table.setRowCount(len(classes))
-        
-        for row, vehicle_class in enumerate(classes):
-            # ID
-            id_item = QTableWidgetItem(str(vehicle_class.class_id))
-            id_item.setFlags(id_item.flags() & ~Qt.ItemIsEditable)
-            self.class_table.setItem(row, 0, id_item)
-            
-            # 表情符號
-            emoji_item = QTableWidgetItem(vehicle_class.emoji)
-            self.class_table.setItem(row, 1, emoji_item)
-            
-            # 名稱
-            name_item = QTableWidgetItem(vehicle_class.name)
-            self.class_table.setItem(row, 2, name_item)
-            
-            # 快捷鍵
-            shortcut_item = QTableWidgetItem(vehicle_class.shortcut_key)
-            self.class_table.setItem(row, 3, shortcut_item)
-            
-            # 顏色
-            color_item = QTableWidgetItem("■")
-            color_item.setBackground(vehicle_class.color)
-            color_item.setFlags(color_item.flags() & ~Qt.ItemIsEditable)
-            self.class_table.setItem(row, 4, color_item)
-            
-            # 啟用狀態
-            enabled_item = QTableWidgetItem("✓" if vehicle_class.enabled else "✗")
-            enabled_item.setFlags(enabled_item.flags() & ~Qt.ItemIsEditable)
-            self.class_table.setItem(row, 5, enabled_item)
-            
-            # 儲存類別 ID 到行資料
-            self.class_table.item(row, 0).setData(Qt.UserRole, vehicle_class.class_id)
+
+        # 批次重建：關閉重繪、信號與排序，避免每個 setItem 觸發更新
+        self.class_table.setUpdatesEnabled(False)
+        self.class_table.blockSignals(True)
+        sorting_enabled = self.class_table.isSortingEnabled()
+        self.class_table.setSortingEnabled(False)
+        try:
+            self.class_table.setRowCount(len(classes))
+            # 唯讀旗標與內容無關，整批重建只需計算一次
+            noedit_flags = QTableWidgetItem().flags() & _NON_EDITABLE_MASK
+            for row, vehicle_class in enumerate(classes):
+                self._set_row_items(row, vehicle_class, noedit_flags)
+        finally:
+            self.class_table.setSortingEnabled(sorting_enabled)
+            self.class_table.blockSignals(False)
+            self.class_table.setUpdatesEnabled(True)
+
+    def _set_row_items(self, row: int, vehicle_class: VehicleClass,
+                       noedit_flags=None):
+        """填入單一列的表格項目"""
+        if noedit_flags is None:
+            noedit_flags = QTableWidgetItem().flags() & _NON_EDITABLE_MASK
+
+        # ID
+        id_item = QTableWidgetItem(str(vehicle_class.class_id))
+        id_item.setFlags(noedit_flags)
+        self.class_table.setItem(row, 0, id_item)
+
+        # 表情符號
+        emoji_item = QTableWidgetItem(vehicle_class.emoji)
+        self.class_table.setItem(row, 1, emoji_item)
+
+        # 名稱
+        name_item = QTableWidgetItem(vehicle_class.name)
+        self.class_table.setItem(row, 2, name_item)
+
+        # 快捷鍵
+        shortcut_item = QTableWidgetItem(vehicle_class.shortcut_key)
+        self.class_table.setItem(row, 3, shortcut_item)
+
+        # 顏色
+        color_item = QTableWidgetItem("■")
+        color_item.setBackground(vehicle_class.color)
+        color_item.setFlags(noedit_flags)
+        self.class_table.setItem(row, 4, color_item)
+
+        # 啟用狀態
+        enabled_item = QTableWidgetItem("✓" if vehicle_class.enabled else "✗")
+        enabled_item.setFlags(noedit_flags)
+        self.class_table.setItem(row, 5, enabled_item)
+
+        # 儲存類別 ID 到行資料
+        id_item.setData(_USER_ROLE, vehicle_class.class_id)
     
     def on_class_selected(self):
         """車種選擇變更"""
@@ -709,7 +1044,7 @@ class VehicleClassManagerDialog(QDialog):
         self.move_down_btn.setEnabled(has_selection and current_row < self.class_table.rowCount() - 1)
         
         if has_selection:
-            class_id = self.class_table.item(current_row, 0).data(Qt.UserRole)
+            class_id = self.class_table.item(current_row, 0).data(_USER_ROLE)
             self.load_class_details(class_id)
         else:
             self.clear_class_details()
@@ -733,8 +1068,7 @@ class VehicleClassManagerDialog(QDialog):
         self.description_edit.setPlainText(vehicle_class.description)
         
         # 更新顏色顯示
-        color_style = f"background-color: {vehicle_class.color.name()}; border: 1px solid black;"
-        self.color_label.setStyleSheet(color_style)
+        self.color_label.setStyleSheet(_COLOR_STYLE_FMT % vehicle_class.color_name)
         self.color_label.setProperty("color", vehicle_class.color)
         
         self.block_detail_signals(False)
@@ -751,7 +1085,7 @@ class VehicleClassManagerDialog(QDialog):
         self.shortcut_edit.clear()
         self.enabled_cb.setChecked(False)
         self.description_edit.clear()
-        self.color_label.setStyleSheet("background-color: red; border: 1px solid black;")
+        self.color_label.setStyleSheet(_COLOR_STYLE_FMT % "red")
         
         self.block_detail_signals(False)
     
@@ -768,16 +1102,38 @@ class VehicleClassManagerDialog(QDialog):
         if self.current_class_id is not None:
             self.details_changed = True
     
+    def _build_color_menu(self) -> QMenu:
+        """建立常用顏色的快選選單（只建構一次後重複使用）"""
+        menu = QMenu(self)
+        for color in _DEFAULT_COLORS:
+            pixmap = QPixmap(16, 16)
+            pixmap.fill(color)
+            action = menu.addAction(QIcon(pixmap), color.name())
+            action.setData(color)
+        menu.addSeparator()
+        menu.addAction("🎨 更多顏色…").setData(None)
+        return menu
+
     def choose_color(self):
         """選擇顏色"""
-        current_color = self.color_label.property("color") or QColor(255, 75, 75)
-        color = QColorDialog.getColor(current_color, self, "選擇標註顏色")
-        
-        if color.isValid():
-            color_style = f"background-color: {color.name()}; border: 1px solid black;"
-            self.color_label.setStyleSheet(color_style)
-            self.color_label.setProperty("color", color)
-            self.on_detail_changed()
+        if self._color_menu is None:
+            self._color_menu = self._build_color_menu()
+
+        action = self._color_menu.exec_(QCursor.pos())
+        if action is None:
+            return
+
+        color = action.data()
+        if color is None:
+            # 「更多顏色…」才退回完整的顏色對話框
+            current_color = self.color_label.property("color") or QColor(255, 75, 75)
+            color = QColorDialog.getColor(current_color, self, "選擇標註顏色")
+            if not color.isValid():
+                return
+
+        self.color_label.setStyleSheet(_COLOR_STYLE_FMT % color.name())
+        self.color_label.setProperty("color", color)
+        self.on_detail_changed()
     
     def add_new_class(self):
         """新增車種"""
@@ -791,12 +1147,29 @@ class VehicleClassManagerDialog(QDialog):
         if self.current_class_id is not None:
             self.save_current_details()
     
+    def _schedule_save(self):
+        """把寫檔合併到事件迴圈回到頂層之後，連續操作只落盤一次"""
+        if self._save_pending:
+            return
+        self._save_pending = True
+        # 借用管理器的批次深度，期間內的 save_classes() 只會標記 _dirty
+        self.class_manager._batch_depth += 1
+        QTimer.singleShot(0, self._do_save)
+
+    def _do_save(self):
+        """延後寫檔的計時器處理：解除批次並實際落盤"""
+        self._save_pending = False
+        self.class_manager._batch_depth -= 1
+        if self.class_manager._batch_depth == 0 and self.class_manager._dirty:
+            self.class_manager._flush()
+
     def save_current_details(self):
         """儲存當前的詳細資訊"""
         if self.current_class_id is None or not self.details_changed:
             return
-        
+
         try:
+            self._schedule_save()
             color = self.color_label.property("color") or QColor(255, 75, 75)
             
             self.class_manager.update_class(
@@ -810,9 +1183,9 @@ class VehicleClassManagerDialog(QDialog):
             )
             
             self.details_changed = False
-            self.load_classes_list()
+            self.load_classes_list(self.current_class_id)
             self.classes_updated.emit()
-            
+
         except ValueError as e:
             QMessageBox.warning(self, "更新失敗", str(e))
     
@@ -862,11 +1235,28 @@ class VehicleClassManagerDialog(QDialog):
         
         if filename:
             try:
-                # 直接複製配置檔案
-                import shutil
-                shutil.copy2(self.class_manager.config_file, filename)
+                # 直接從記憶體中的資料序列化，免去讀回配置檔
+                data = {
+                    'classes': [
+                        cls.to_dict()
+                        for cls in self.class_manager.classes.values()
+                    ],
+                    'next_id': self.class_manager.next_id,
+                    'version': '1.0'
+                }
+
+                if ORJSON_AVAILABLE:
+                    payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+                else:
+                    payload = json.dumps(
+                        data, ensure_ascii=False, indent=2
+                    ).encode('utf-8')
+
+                with open(filename, 'wb') as f:
+                    f.write(payload)
+
                 QMessageBox.information(self, "匯出成功", f"車種設定已匯出至：\n{filename}")
-                
+
             except Exception as e:
                 QMessageBox.critical(self, "匯出失敗", f"匯出過程發生錯誤：\n{str(e)}")
     
@@ -896,22 +1286,62 @@ class VehicleClassManagerDialog(QDialog):
             return
         
         filename, _ = QFileDialog.getOpenFileName(
-            self, "匯入車種設定", "",
-            "JSON 檔案 (*.json);;所有檔案 (*)"
+            self, "匯入車種設定", self._last_import_dir,
+            "JSON 檔案 (*.json);;所有檔案 (*)",
+            options=QFileDialog.DontResolveSymlinks | QFileDialog.ReadOnly
         )
-        
+
         if filename:
+            self._last_import_dir = os.path.dirname(filename)
             try:
-                # 備份現有設定
-                backup_file = self.class_manager.config_file + ".backup"
-                import shutil
-                shutil.copy2(self.class_manager.config_file, backup_file)
-                
-                # 替換設定檔
-                shutil.copy2(filename, self.class_manager.config_file)
-                
-                # 重新載入
-                self.class_manager.load_classes()
+                # 選到目前使用中的設定檔就不必匯入
+                config_file = self.class_manager.config_file
+                if os.path.exists(config_file) and os.path.samefile(filename, config_file):
+                    QMessageBox.information(
+                        self, "無需匯入",
+                        "選取的檔案就是目前使用中的設定檔，無需匯入。"
+                    )
+                    return
+
+                # 先讀取並解析來源檔，驗證通過才動到現有設定
+                with open(filename, 'rb') as f:
+                    new_bytes = f.read()
+                data = orjson.loads(new_bytes) if ORJSON_AVAILABLE else json.loads(new_bytes)
+                if not isinstance(data.get('classes'), list):
+                    raise ValueError("設定檔缺少 'classes' 清單")
+                for class_data in data['classes']:
+                    VehicleClass.from_dict(class_data)
+
+                # 內容與現有設定逐位元組相同時，備份與覆寫都是白工，
+                # 只重建記憶體狀態並刷新 UI 即可
+                if os.path.exists(config_file):
+                    with open(config_file, 'rb') as f:
+                        old_bytes = f.read()
+                    if old_bytes == new_bytes:
+                        self.class_manager.load_classes_from_data(data)
+                        self.load_classes_list()
+                        self.clear_class_details()
+                        self.classes_updated.emit()
+                        QMessageBox.information(
+                            self, "匯入成功",
+                            "匯入的設定與現有設定完全相同，已重新整理。"
+                        )
+                        return
+
+                # 備份現有設定：同一檔案系統上 os.replace 只是改名 inode，
+                # 不必逐位元組複製，而且對當機是原子的
+                backup_file = config_file + ".backup"
+                if os.path.exists(config_file):
+                    os.replace(config_file, backup_file)
+
+                # 以剛讀進來的內容原子寫入新設定，不再重讀來源檔
+                tmp_file = f"{config_file}.{os.getpid()}.tmp"
+                with open(tmp_file, 'wb') as f:
+                    f.write(new_bytes)
+                os.replace(tmp_file, config_file)
+
+                # 直接用已解析的資料重建狀態，省去再開一次設定檔
+                self.class_manager.load_classes_from_data(data)
                 self.load_classes_list()
                 self.clear_class_details()
                 self.classes_updated.emit()
@@ -937,11 +1367,13 @@ class VehicleClassManagerDialog(QDialog):
             return
         
         filename, _ = QFileDialog.getOpenFileName(
-            self, "匯入類別清單", "",
-            "文字檔案 (*.txt);;所有檔案 (*)"
+            self, "匯入類別清單", self._last_import_dir,
+            "文字檔案 (*.txt);;所有檔案 (*)",
+            options=QFileDialog.DontResolveSymlinks | QFileDialog.ReadOnly
         )
-        
+
         if filename:
+            self._last_import_dir = os.path.dirname(filename)
             if self.class_manager.import_classes_txt(filename):
                 self.load_classes_list()
                 self.clear_class_details()
@@ -962,65 +1394,15 @@ class VehicleClassManagerDialog(QDialog):
         if reply != QMessageBox.Yes:
             return
         
-        templates = {
-            "basic": [
-                {'name': '機車', 'emoji': '🏍', 'shortcut_key': '1'},
-                {'name': '汽車', 'emoji': '🚗', 'shortcut_key': '2'},
-                {'name': '卡車', 'emoji': '🚛', 'shortcut_key': '3'},
-                {'name': '公車', 'emoji': '🚌', 'shortcut_key': '4'},
-            ],
-            "detailed": [
-                {'name': '機車', 'emoji': '🏍', 'shortcut_key': '1'},
-                {'name': '汽車', 'emoji': '🚗', 'shortcut_key': '2'},
-                {'name': '卡車', 'emoji': '🚛', 'shortcut_key': '3'},
-                {'name': '公車', 'emoji': '🚌', 'shortcut_key': '4'},
-                {'name': '計程車', 'emoji': '🚕', 'shortcut_key': '5'},
-                {'name': '警車', 'emoji': '🚓', 'shortcut_key': '6'},
-                {'name': '救護車', 'emoji': '🚑', 'shortcut_key': '7'},
-                {'name': '消防車', 'emoji': '🚒', 'shortcut_key': '8'},
-            ],
-            "transport": [
-                {'name': '機車', 'emoji': '🏍', 'shortcut_key': '1'},
-                {'name': '汽車', 'emoji': '🚗', 'shortcut_key': '2'},
-                {'name': '卡車', 'emoji': '🚛', 'shortcut_key': '3'},
-                {'name': '公車', 'emoji': '🚌', 'shortcut_key': '4'},
-                {'name': '腳踏車', 'emoji': '🚲', 'shortcut_key': '5'},
-                {'name': '電動車', 'emoji': '🔋', 'shortcut_key': '6'},
-                {'name': '三輪車', 'emoji': '🛺', 'shortcut_key': '7'},
-                {'name': '計程車', 'emoji': '🚕', 'shortcut_key': '8'},
-            ],
-            "commercial": [
-                {'name': '小貨車', 'emoji': '🚚', 'shortcut_key': '1'},
-                {'name': '中型貨車', 'emoji': '🚛', 'shortcut_key': '2'},
-                {'name': '大型貨車', 'emoji': '🚛', 'shortcut_key': '3'},
-                {'name': '聯結車', 'emoji': '🚛', 'shortcut_key': '4'},
-                {'name': '工程車', 'emoji': '🚜', 'shortcut_key': '5'},
-                {'name': '混凝土車', 'emoji': '🚚', 'shortcut_key': '6'},
-            ]
-        }
-        
-        template_classes = templates.get(template_name, [])
+        template_classes = _TEMPLATES.get(template_name, ())
         if not template_classes:
             return
         
         try:
-            # 清除現有類別
-            self.class_manager.classes = {}
-            self.class_manager.next_id = 0
-            
-            # 添加模板類別
-            for i, cls_data in enumerate(template_classes):
-                vehicle_class = VehicleClass(
-                    class_id=i,
-                    name=cls_data['name'],
-                    emoji=cls_data['emoji'],
-                    shortcut_key=cls_data['shortcut_key']
-                )
-                self.class_manager.classes[i] = vehicle_class
-            
-            self.class_manager.next_id = len(template_classes)
-            self.class_manager.save_classes()
-            
+            # 整批取代模板類別，寫檔則延後到事件迴圈合併執行
+            self._schedule_save()
+            self.class_manager.bulk_set_classes(list(template_classes))
+
             self.load_classes_list()
             self.clear_class_details()
             self.classes_updated.emit()
@@ -1049,6 +1431,8 @@ class AddClassDialog(QDialog):
     def __init__(self, class_manager: VehicleClassManager, parent=None):
         super().__init__(parent)
         self.class_manager = class_manager
+        # 關閉即銷毀，避免殘留實例拖慢後續對話框的事件過濾鏈
+        self.setAttribute(Qt.WA_DeleteOnClose, True)
         self.setWindowTitle('新增車種')
         self.setFixedSize(400, 350)
         self.setup_ui()
@@ -1078,7 +1462,7 @@ class AddClassDialog(QDialog):
         color_layout = QHBoxLayout()
         self.color_label = QLabel("    ")
         self.current_color = QColor(255, 75, 75)
-        self.color_label.setStyleSheet(f"background-color: {self.current_color.name()}; border: 1px solid black;")
+        self.color_label.setStyleSheet(_COLOR_STYLE_FMT % self.current_color.name())
         self.color_label.setFixedSize(30, 20)
         
         self.color_btn = QPushButton("選擇顏色")
@@ -1107,7 +1491,7 @@ class AddClassDialog(QDialog):
         color = QColorDialog.getColor(self.current_color, self, "選擇標註顏色")
         if color.isValid():
             self.current_color = color
-            self.color_label.setStyleSheet(f"background-color: {color.name()}; border: 1px solid black;")
+            self.color_label.setStyleSheet(_COLOR_STYLE_FMT % color.name())
     
     def accept_dialog(self):
         """接受對話框"""